@@ -0,0 +1,192 @@
+import csv
+import json
+import os
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from schedule.engines import engine_names, get_engine
+from schedule.metrics import RunRecord, recording
+from schedule.models import ScheduleVersion
+from schedule.or_tools_scheduler import (
+    balance,
+    init_worker,
+    load_problem,
+    place_rooms,
+    validate_problem,
+)
+from schedule.persistence import save_version
+from schedule.profiles import DEFAULT_PROFILE, profile_names, solver_parameters
+from schedule.synthetic import benchmark_database, create_school
+
+FIELDS = [
+    "classes",
+    "teachers",
+    "engine",
+    "status",
+    "load_s",
+    "validate_s",
+    "build_s",
+    "solve_s",
+    "persist_s",
+    "peak_rss_mb",
+    "variables",
+    "constraints",
+    "objective",
+]
+
+
+def run_engine(engine, parameters):
+    """
+    Generate a timetable for the school in the database with ``engine``,
+    timing each step. Runs in a process of its own, so that peak RSS is
+    the engine's. Build time is the engine's time outside ``run_solver``;
+    engines solving in other processes only report their total time.
+    """
+    row = {"engine": engine}
+
+    started = time.perf_counter()
+    problem, snapshot = load_problem()
+    problem["solver"] = parameters
+    row["load_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        validate_problem(problem, snapshot)
+    except Exception as e:
+        row["status"] = f"invalid: {e}"
+        return row
+    row["validate_s"] = time.perf_counter() - started
+
+    record = RunRecord()
+    started = time.perf_counter()
+    with recording(record):
+        assignments = get_engine(engine)(problem)
+    elapsed = time.perf_counter() - started
+    if record.models:
+        row["solve_s"] = record.total("solve_seconds")
+        row["build_s"] = elapsed - row["solve_s"]
+        row["variables"] = record.total("variables")
+        row["constraints"] = record.total("constraints")
+    else:
+        row["solve_s"] = elapsed
+
+    if assignments is None:
+        row["status"] = "no solution"
+    else:
+        row["status"] = "ok"
+        row["objective"] = balance(assignments, problem["class_shifts"])
+        ScheduleVersion.objects.all().delete()
+        started = time.perf_counter()
+        try:
+            assignments, rooms = place_rooms(problem, assignments)
+        except Exception:
+            row["status"] = "no rooms"
+        else:
+            save_version(assignments, rooms, note=f"Benchmark {engine}")
+            row["persist_s"] = time.perf_counter() - started
+    # Kilobytes on Linux
+    row["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return row
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the engines on synthetic schools in a throwaway test database "
+        "and write a JSON or CSV report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--classes", type=int, nargs="+", default=[10, 25, 50, 100, 200]
+        )
+        parser.add_argument("--engines", nargs="+", choices=engine_names(), default=engine_names())
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--profile", choices=profile_names(), default=DEFAULT_PROFILE)
+        parser.add_argument(
+            "--seconds", type=float, default=60, help="Solver time limit of each engine run"
+        )
+        parser.add_argument("--output", help="Report file, .json or .csv")
+        parser.add_argument(
+            "--keepdb", action="store_true", help="Keep the test database between benchmarks"
+        )
+
+    def handle(self, *args, **options):
+        parameters = solver_parameters(options["profile"], max_time_in_seconds=options["seconds"])
+        with benchmark_database(keepdb=options["keepdb"]):
+            rows = self.run_benchmarks(options, parameters)
+
+        if options["output"]:
+            self.write_report(options["output"], rows, options, parameters)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def run_benchmarks(self, options, parameters):
+        self.stdout.write(
+            f"{'classes':>8} {'engine':>16} {'load, s':>8} {'build, s':>9} {'solve, s':>9} "
+            f"{'save, s':>8} {'RSS, MB':>8} {'vars':>8} {'objective':>10}  status"
+        )
+        rows = []
+        for num_classes in options["classes"]:
+            school = create_school(num_classes, seed=options["seed"])
+            for engine in options["engines"]:
+                # Connections must not be shared with the forked process
+                connections.close_all()
+                with ProcessPoolExecutor(
+                    max_workers=1, mp_context=get_context("fork"), initializer=init_worker
+                ) as pool:
+                    row = pool.submit(run_engine, engine, parameters).result()
+                row.update(classes=num_classes, teachers=school["teachers"])
+                rows.append(row)
+                self.stdout.write(
+                    f"{num_classes:>8} {engine:>16} {self.cell(row, 'load_s', 8)} "
+                    f"{self.cell(row, 'build_s', 9)} {self.cell(row, 'solve_s', 9)} "
+                    f"{self.cell(row, 'persist_s', 8)} {self.cell(row, 'peak_rss_mb', 8, '.0f')} "
+                    f"{self.cell(row, 'variables', 8, 'd')} {self.cell(row, 'objective', 10, 'd')}"
+                    f"  {row['status']}"
+                )
+        return rows
+
+    def cell(self, row, field, width, spec=".2f"):
+        value = row.get(field)
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}{spec}}"
+
+    def write_report(self, path, rows, options, parameters):
+        commit = git_commit()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["commit"] + FIELDS)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow({"commit": commit, **row})
+            return
+        report = {
+            "commit": commit,
+            "created_at": timezone.now().isoformat(),
+            "seed": options["seed"],
+            "profile": options["profile"],
+            "parameters": parameters,
+            "cpu_count": os.cpu_count(),
+            "runs": [{field: row.get(field) for field in FIELDS} for row in rows],
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ortools.sat.python import cp_model
+
+from schedule.generator.interval_model import IntervalModel
+from schedule.metrics import proto_size
+from schedule.or_tools_scheduler import build_model, load_problem
+from schedule.profiles import make_solver, profile_names, solver_parameters
+from schedule.synthetic import benchmark_database, create_school
+
+
+def build_joint(problem):
+    model, reg = build_model(problem)
+    return model
+
+
+def build_compact(problem):
+    return IntervalModel(problem).build().model
+
+
+FORMULATIONS = {"joint": build_joint, "compact": build_compact}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare CP-SAT model formulations on size, build and solve time for "
+        "synthetic schools in a throwaway test database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--classes", type=int, nargs="+", default=[5, 10, 20, 40, 80]
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--formulations", nargs="+", choices=list(FORMULATIONS), default=list(FORMULATIONS)
+        )
+        parser.add_argument(
+            "--solve", type=float, default=0, help="Solve each model for this many seconds"
+        )
+        parser.add_argument("--profile", choices=profile_names(), help="Solver parameter profile")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.run_benchmarks(options)
+
+    def run_benchmarks(self, options):
+        self.stdout.write(
+            f"{'classes':>8} {'model':>8} {'vars':>9} {'constr':>9} {'proto, KB':>10} "
+            f"{'build, s':>9} {'status':>10} {'solve, s':>9} {'objective':>10}"
+        )
+        for num_classes in options["classes"]:
+            # The schools of benchmark_engines, loaded as the engines load them
+            create_school(num_classes, seed=options["seed"])
+            problem, snapshot = load_problem()
+            for name in options["formulations"]:
+                started = time.perf_counter()
+                model = FORMULATIONS[name](problem)
+                elapsed = time.perf_counter() - started
+                proto = model.Proto()
+                row = (
+                    f"{num_classes:>8} {name:>8} {len(proto.variables):>9} "
+                    f"{len(proto.constraints):>9} {proto_size(model) / 1024:>10.0f} {elapsed:>9.2f}"
+                )
+                if options["solve"]:
+                    solver = make_solver(
+                        solver_parameters(options["profile"]),
+                        max_time_in_seconds=options["solve"],
+                    )
+                    status = solver.Solve(model)
+                    objective = (
+                        solver.ObjectiveValue()
+                        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+                        else float("nan")
+                    )
+                    row += (
+                        f" {solver.StatusName(status):>10} {solver.WallTime():>9.2f} {objective:>10.0f}"
+                    )
+                self.stdout.write(row)
@@ -0,0 +1,18 @@
+# core/management/commands/build_timetables.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from schedule.persistence import active_version
+from schedule.timetables import build_timetables
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored class and teacher timetables of the active schedule'
+
+    def handle(self, *args, **options):
+        version = active_version()
+        if version is None:
+            raise CommandError('No active schedule version.')
+        with transaction.atomic():
+            build_timetables(version)
+        self.stdout.write(self.style.SUCCESS(f'Timetables of version {version.pk} rebuilt'))
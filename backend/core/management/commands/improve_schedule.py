@@ -0,0 +1,27 @@
+# core/management/commands/improve_schedule.py
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.lns import improve_schedule
+from schedule.profiles import DEFAULT_PROFILE, profile_names
+
+
+class Command(BaseCommand):
+    help = 'Improve a stored schedule with Large Neighbourhood Search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--version', dest='version_id', type=int, help='Schedule version, the active one by default')
+        parser.add_argument('--seconds', type=float, default=60)
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=profile_names())
+
+    def handle(self, *args, **options):
+        try:
+            result = improve_schedule(
+                version_id=options['version_id'],
+                time_limit=options['seconds'],
+                seed=options['seed'],
+                profile=options['profile'],
+            )
+        except Exception as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Schedule improved: {result}'))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.jobs import run_jobs
+from schedule.models import GenerationJob, JobKind, JobStatus
+from schedule.profiles import DEFAULT_PROFILE, profile_names
+from schedule.serializers import RescheduleSerializer
+
+
+def class_subject(value):
+    class_id, _, subject_id = value.partition(':')
+    return [int(class_id), int(subject_id)]
+
+
+class Command(BaseCommand):
+    help = 'Re-solve only the classes touched by a change, keeping all other lessons'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--absent', dest='absent_teacher_ids', type=int, action='append', default=[], help='Teacher who gives no lessons')
+        parser.add_argument('--teacher', dest='teacher_ids', type=int, action='append', default=[], help='Teacher whose work time or subjects changed')
+        parser.add_argument('--class', dest='class_ids', type=int, action='append', default=[])
+        parser.add_argument('--hours', dest='subject_hours', type=class_subject, action='append', default=[], help='CLASS_ID:SUBJECT_ID whose weekly hours changed')
+        parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=profile_names())
+
+    def handle(self, *args, **options):
+        arguments = RescheduleSerializer(
+            data={name: options[name] for name in RescheduleSerializer.OPTIONS + ('profile',)}
+        )
+        if not arguments.is_valid():
+            raise CommandError(str(arguments.errors))
+
+        # Queued like the dashboard's jobs, so it waits for a running generation
+        job = GenerationJob.objects.create(
+            kind=JobKind.RESCHEDULE, profile=options['profile'], options=arguments.options()
+        )
+        run_jobs()
+        job.refresh_from_db()
+        if job.status == JobStatus.FAILED:
+            raise CommandError(job.error)
+        if job.status != JobStatus.SUCCEEDED:
+            self.stdout.write(f'Another job is running; job #{job.pk} waits for its worker.')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Schedule rescheduled in job #{job.pk}.'))
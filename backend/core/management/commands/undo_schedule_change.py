@@ -0,0 +1,14 @@
+# core/management/commands/undo_schedule_change.py
+from django.core.management.base import BaseCommand, CommandError
+
+from schedule.persistence import undo_change
+
+
+class Command(BaseCommand):
+    help = 'Undo the latest in-place change of the active schedule'
+
+    def handle(self, *args, **options):
+        changeset = undo_change()
+        if changeset is None:
+            raise CommandError('No schedule change to undo.')
+        self.stdout.write(self.style.SUCCESS(f'Schedule change undone: {changeset}'))
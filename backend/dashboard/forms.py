@@ -17,12 +17,13 @@ class SubjectForm(forms.ModelForm):
 class SchoolClassForm(forms.ModelForm):
     class Meta:
         model = SchoolClass
-        fields = ["grade", "letter", "shift", "study_plan"]
+        fields = ["grade", "letter", "shift", "study_plan", "students"]
         widgets = {
             "grade": forms.Select(attrs={"class": "form-control"}),
             "letter": forms.TextInput(attrs={"class": "form-control"}),
             "shift": forms.Select(attrs={"class": "form-control"}),
             "study_plan": forms.Select(attrs={"class": "form-control"}),
+            "students": forms.NumberInput(attrs={"class": "form-control"}),
         }
 
     def save(self, commit=True):
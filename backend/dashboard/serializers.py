@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from schedule.models import Subject, StudyPlan, StudyPlanEntry, SchoolClass, Holiday, Lesson
+from schedule.persistence import active_version
 from users.models import Teacher
 
 class SubjectSerializer(serializers.ModelSerializer):
@@ -38,3 +39,21 @@ class LessonSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lesson
         fields = "__all__"
+        # Lessons are edited in the active version, see LessonViewSet
+        read_only_fields = ["version"]
+
+    def validate(self, attrs):
+        # DRF drops the unique_together check when version is read-only
+        version = self.instance.version if self.instance else active_version()
+        if version is None:
+            raise serializers.ValidationError("Нет активного расписания.")
+        slot = {
+            field: attrs.get(field, getattr(self.instance, field, None))
+            for field in ("school_class", "weekday", "lesson_number")
+        }
+        clashes = Lesson.objects.filter(version=version, **slot)
+        if self.instance is not None:
+            clashes = clashes.exclude(pk=self.instance.pk)
+        if clashes.exists():
+            raise serializers.ValidationError("У класса уже есть урок в это время.")
+        return attrs
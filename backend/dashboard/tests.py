@@ -1,3 +1,109 @@
+import datetime
+import json
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from schedule.models import (
+    GenerationJob,
+    JobKind,
+    Lesson,
+    ScheduleVersion,
+    TimetableDocument,
+    TimetableKind,
+)
+from schedule.persistence import save_version
+from schedule.school_calendar import SchoolCalendar
+from schedule.tests import create_small_school, some_lessons
+from users.models import AdminUser, Teacher
+
+
+class LessonApiTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        self.client = APIClient()
+        self.client.force_authenticate(AdminUser.objects.create_user("admin", "password"))
+        self.lessons = some_lessons()
+        self.version = save_version(self.lessons, {})
+        c_id, s_id, t_id, d, l = self.lessons[0]
+        self.lesson = {"school_class": c_id, "subject": s_id, "teacher": t_id, "weekday": d}
+
+    def class_timetable(self, class_id):
+        document = TimetableDocument.objects.get(kind=TimetableKind.CLASS, owner_id=class_id)
+        return json.loads(document.body)["lessons"]
+
+    def test_created_lesson_joins_the_active_version_and_its_timetable(self):
+        old = ScheduleVersion.objects.create()
+        response = self.client.post(
+            "/api/lessons/", {**self.lesson, "lesson_number": 7, "version": old.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        lesson = Lesson.objects.get(pk=response.json()["id"])
+        self.assertEqual(lesson.version, self.version)
+        self.assertIn(
+            lesson.pk, [row["id"] for row in self.class_timetable(lesson.school_class_id)]
+        )
+
+    def test_lesson_in_a_taken_slot_is_rejected(self):
+        response = self.client.post(
+            "/api/lessons/", {**self.lesson, "lesson_number": self.lessons[0][4]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("У класса уже есть урок в это время.", str(response.json()))
+
+        # Moving a lesson onto another lesson of its class is a clash too
+        response = self.client.post(
+            "/api/lessons/", {**self.lesson, "lesson_number": 7}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        lesson = Lesson.objects.active().get(
+            school_class_id=self.lesson["school_class"], lesson_number=self.lessons[0][4]
+        )
+        response = self.client.patch(
+            f"/api/lessons/{lesson.pk}/", {"lesson_number": 7}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleted_lesson_leaves_the_timetable(self):
+        lesson = Lesson.objects.active().first()
+        response = self.client.delete(f"/api/lessons/{lesson.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.class_timetable(lesson.school_class_id), [])
+
+
+class HolidaysViewTests(TestCase):
+    def test_saved_holidays_refresh_the_calendar(self):
+        day = datetime.date(2026, 11, 5)
+        self.assertTrue(SchoolCalendar().is_school_day(day))
+        self.client.post("/legacy/holidays/", {"selected_dates": [day.isoformat()]})
+        self.assertFalse(SchoolCalendar().is_school_day(day))
+        self.client.post("/legacy/holidays/", {"selected_dates": []})
+        self.assertTrue(SchoolCalendar().is_school_day(day))
+
+
+@mock.patch("schedule.jobs.start_worker")
+class RescheduleViewTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        self.teacher = Teacher.objects.order_by("pk").first()
+
+    def test_absent_teachers_are_queued_for_rescheduling(self, start_worker):
+        response = self.client.post(
+            "/schedule/reschedule/",
+            {"absent_teacher_ids": [self.teacher.pk], "profile": "fast_feasible"},
+        )
+        job = GenerationJob.objects.get()
+        self.assertRedirects(
+            response, f"/schedule/?job={job.pk}", fetch_redirect_response=False
+        )
+        self.assertEqual(job.kind, JobKind.RESCHEDULE)
+        self.assertEqual(job.profile, "fast_feasible")
+        self.assertEqual(job.options["absent_teacher_ids"], [self.teacher.pk])
+        start_worker.assert_called_once()
 
-# Create your tests here.
+    def test_no_teachers_queue_nothing(self, start_worker):
+        response = self.client.post("/schedule/reschedule/", {})
+        self.assertRedirects(response, "/schedule/", fetch_redirect_response=False)
+        self.assertFalse(GenerationJob.objects.exists())
+        start_worker.assert_not_called()
@@ -15,6 +15,22 @@ urlpatterns = [
     path("login/", views.login_view, name="login"),
     path("", views.home, name="dashboard-home"),
     path("schedule/", views.generate_schedule_view, name="schedule"),
+    path("schedule/reschedule/", views.reschedule_view, name="reschedule"),
+    path(
+        "schedule/jobs/<int:job_id>/",
+        views.generation_job_status,
+        name="generation_job_status",
+    ),
+    path(
+        "schedule/jobs/<int:job_id>/events/",
+        views.generation_job_events,
+        name="generation_job_events",
+    ),
+    path(
+        "schedule/jobs/<int:job_id>/stop/",
+        views.generation_job_stop,
+        name="generation_job_stop",
+    ),
     path("legacy/", include([
         path("study-plans/", views.study_plans_view, name="study_plans"),
         path("subjects/", views.subjects_view, name="subjects"),
@@ -1,11 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib import messages
-from schedule.or_tools_scheduler import generate_schedule
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from schedule.engines import engine_names
+from schedule.jobs import enqueue_generation, enqueue_reschedule, request_stop
 from schedule.models import *
+from schedule.profiles import DEFAULT_PROFILE, profile_names
+from schedule.school_calendar import refresh_holidays
+from schedule.serializers import RescheduleSerializer
 from users.models import *
 from .forms import *
 import datetime
+import json
+import time
 from datetime import date, datetime as dt
 from calendar import monthrange, month_name
 
@@ -221,9 +230,11 @@ def holidays_view(request):
         ]
 
         # Удаляем старые даты и сохраняем новые
+        old_dates = set(Holiday.objects.values_list("date", flat=True))
         Holiday.objects.exclude(date__in=selected_dates).delete()
         for d in selected_dates:
             Holiday.objects.get_or_create(date=d)
+        refresh_holidays(old_dates ^ set(selected_dates))
 
     holidays = set(Holiday.objects.values_list("date", flat=True))
     months = generate_months(current_year)
@@ -257,15 +268,20 @@ def generate_months(year):
 
 def generate_schedule_view(request):
     if request.method == "POST":
-        try:
-            generate_schedule()
-            messages.success(request, "Расписание успешно сгенерировано!")
-        except Exception as e:
-            messages.error(request, f"Ошибка при генерации: {str(e)}")
-        return redirect("schedule")
+        engine = request.POST.get("engine", "joint")
+        if engine not in engine_names():
+            messages.error(request, f"Неизвестный алгоритм: {engine}")
+            return redirect("schedule")
+        profile = request.POST.get("profile", DEFAULT_PROFILE)
+        if profile not in profile_names():
+            messages.error(request, f"Неизвестный профиль решателя: {profile}")
+            return redirect("schedule")
+        job = enqueue_generation(engine, profile)
+        messages.info(request, f"Генерация запущена (задача #{job.pk})")
+        return redirect(f'{reverse("schedule")}?job={job.pk}')
 
     # Показываем текущее расписание
-    all_lessons = Lesson.objects.select_related(
+    all_lessons = Lesson.objects.active().select_related(
         "school_class", "subject", "teacher", "room"
     ).order_by(
         "school_class__grade__number",
@@ -290,10 +306,99 @@ def generate_schedule_view(request):
     return render(
         request,
         "dashboard/generate_schedule.html",
-        {"grouped": grouped, "max_lessons": max_lessons, "shift_map": shift_map},
+        {
+            "grouped": grouped,
+            "max_lessons": max_lessons,
+            "shift_map": shift_map,
+            "job_id": request.GET.get("job"),
+            "engines": engine_names(),
+            "profiles": profile_names(),
+            "default_profile": DEFAULT_PROFILE,
+            "teachers": Teacher.objects.order_by("last_name", "first_name"),
+        },
     )
 
 
+@require_POST
+def reschedule_view(request):
+    # Перепланирование только классов отсутствующих учителей
+    arguments = RescheduleSerializer(
+        data={
+            "absent_teacher_ids": request.POST.getlist("absent_teacher_ids"),
+            "profile": request.POST.get("profile", DEFAULT_PROFILE),
+        }
+    )
+    if not arguments.is_valid():
+        messages.error(request, "Выберите отсутствующих учителей.")
+        return redirect("schedule")
+    job = enqueue_reschedule(arguments.validated_data["profile"], **arguments.options())
+    messages.info(request, f"Перепланирование запущено (задача #{job.pk})")
+    return redirect(f'{reverse("schedule")}?job={job.pk}')
+
+
+def job_payload(job):
+    return {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "stage": job.stage,
+        "error": job.error,
+        "objective": job.objective,
+        "best_bound": job.best_bound,
+        "gap": job.gap,
+        "elapsed": job.elapsed,
+        "solution_count": job.solution_count,
+        "member": job.member,
+        "stop_requested": job.stop_requested,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def generation_job_status(request, job_id):
+    job = get_object_or_404(GenerationJob, pk=job_id)
+    return JsonResponse(job_payload(job))
+
+
+# Seconds a job event stream stays open before the client reconnects
+EVENT_STREAM_SECONDS = 5
+
+
+def generation_job_events(request, job_id):
+    """
+    Server-sent events with the job state, once a second. Each response
+    ends after ``EVENT_STREAM_SECONDS`` so that it does not hold a worker
+    for the whole solve; EventSource reconnects after ``retry``.
+    """
+    get_object_or_404(GenerationJob, pk=job_id)
+
+    def stream():
+        yield "retry: 1000\n\n"
+        started = time.monotonic()
+        while True:
+            job = GenerationJob.objects.get(pk=job_id)
+            data = json.dumps(job_payload(job), cls=DjangoJSONEncoder)
+            yield f"data: {data}\n\n"
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+                return
+            if time.monotonic() - started >= EVENT_STREAM_SECONDS:
+                return
+            time.sleep(1)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+@require_POST
+def generation_job_stop(request, job_id):
+    get_object_or_404(GenerationJob, pk=job_id)
+    request_stop(job_id)
+    return JsonResponse({"id": job_id, "stop_requested": True})
+
+
 def login_view(request):
     if request.method == "POST":
         username = request.POST.get("username")
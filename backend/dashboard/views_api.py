@@ -1,5 +1,8 @@
 from rest_framework import viewsets
 from schedule.models import Subject, StudyPlan, StudyPlanEntry, SchoolClass, Holiday, Lesson
+from schedule.persistence import active_version
+from schedule.school_calendar import refresh_holidays
+from schedule.timetables import lesson_owners, rebuild_timetables
 from users.models import Teacher
 from .serializers import *
 
@@ -27,6 +30,32 @@ class HolidayViewSet(viewsets.ModelViewSet):
     queryset = Holiday.objects.all()
     serializer_class = HolidaySerializer
 
+    def perform_create(self, serializer):
+        holiday = serializer.save()
+        refresh_holidays([holiday.date])
+
+    def perform_update(self, serializer):
+        old_date = serializer.instance.date
+        holiday = serializer.save()
+        refresh_holidays([old_date, holiday.date])
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        refresh_holidays([instance.date])
+
 class LessonViewSet(viewsets.ModelViewSet):
-    queryset = Lesson.objects.all()
+    queryset = Lesson.objects.active()
     serializer_class = LessonSerializer
+
+    def perform_create(self, serializer):
+        lesson = serializer.save(version=active_version())
+        rebuild_timetables(*lesson_owners([lesson]))
+
+    def perform_update(self, serializer):
+        before = lesson_owners([serializer.instance])
+        after = lesson_owners([serializer.save()])
+        rebuild_timetables(before[0] | after[0], before[1] | after[1])
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        rebuild_timetables(*lesson_owners([instance]))
@@ -1,5 +1,18 @@
-from django.contrib import admin
-from .models import GradeLevel, SchoolClass, Subject, Room, SubjectHours, Lesson
+from django.contrib import admin, messages
+from .models import (
+    GradeLevel,
+    SchoolClass,
+    Subject,
+    Room,
+    SubjectHours,
+    Lesson,
+    GenerationJob,
+    ScheduleChange,
+    ScheduleVersion,
+    SolveResult,
+)
+from .persistence import activate_version
+from .timetables import lesson_owners, rebuild_timetables
 
 
 @admin.register(GradeLevel)
@@ -10,15 +23,16 @@ class GradeLevelAdmin(admin.ModelAdmin):
 
 @admin.register(SchoolClass)
 class SchoolClassAdmin(admin.ModelAdmin):
-    list_display = ("__str__", "grade", "letter", "shift")
+    list_display = ("__str__", "grade", "letter", "shift", "students")
     list_filter = ("shift", "grade")
     search_fields = ("letter",)
 
 
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
-    list_display = ("name",)
+    list_display = ("name", "capacity")
     search_fields = ("name",)
+    filter_horizontal = ("subjects",)
 
 
 @admin.register(Subject)
@@ -45,6 +59,71 @@ class LessonAdmin(admin.ModelAdmin):
         "lesson_number",
         "room",
     )
-    list_filter = ("weekday", "school_class", "subject", "teacher")
+    list_filter = ("version", "weekday", "school_class", "subject", "teacher")
     search_fields = ("school_class__letter", "subject__name", "teacher__full_name")
     ordering = ("school_class", "weekday", "lesson_number")
+
+    def save_model(self, request, obj, form, change):
+        lessons = [obj]
+        if change:
+            lessons.append(Lesson.objects.get(pk=obj.pk))
+        super().save_model(request, obj, form, change)
+        rebuild_timetables(*lesson_owners(lessons))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        rebuild_timetables(*lesson_owners([obj]))
+
+    def delete_queryset(self, request, queryset):
+        owners = lesson_owners(queryset)
+        super().delete_queryset(request, queryset)
+        rebuild_timetables(*owners)
+
+
+@admin.register(ScheduleVersion)
+class ScheduleVersionAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "note", "is_active")
+    list_filter = ("is_active",)
+    # Switched only by the action, which rebuilds the timetable documents
+    readonly_fields = ("is_active",)
+    actions = ["activate"]
+
+    @admin.action(description="Сделать активной")
+    def activate(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Выберите одну версию расписания.", messages.ERROR)
+            return
+        version = queryset.get()
+        activate_version(version)
+        self.message_user(request, f"Версия #{version.pk} активна.", messages.SUCCESS)
+
+
+@admin.register(ScheduleChange)
+class ScheduleChangeAdmin(admin.ModelAdmin):
+    list_display = ("id", "version", "created_at")
+    readonly_fields = ("created_at",)
+
+
+@admin.register(SolveResult)
+class SolveResultAdmin(admin.ModelAdmin):
+    list_display = ("id", "engine", "fingerprint", "created_at", "used_at")
+    list_filter = ("engine",)
+    readonly_fields = ("created_at", "used_at")
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "kind", "engine", "profile", "status", "stage", "created_at", "finished_at"
+    )
+    list_filter = ("status", "kind", "engine", "profile")
+    readonly_fields = (
+        "kind",
+        "options",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "metrics",
+        "worker",
+        "heartbeat_at",
+    )
@@ -0,0 +1,108 @@
+"""
+Cache of solved timetables keyed by a fingerprint of the solver input.
+
+Every class gets a digest of its part of the input: its shift, weekly
+hours, the difficulty of its subjects and the qualified teachers with
+their weekly limits and availability. The fingerprint hashes the class
+digests together with the engine and the solver parameters, so an
+unchanged input is answered from the cache. When only some classes
+changed, the stored result sharing the most class digests provides hints
+for the classes that did not.
+"""
+
+import hashlib
+import json
+import logging
+from collections import defaultdict
+
+from schedule.models import SolveResult
+
+logger = logging.getLogger(__name__)
+
+# Stored results, least recently used ones are dropped first
+KEEP_RESULTS = 20
+# Share of classes with unchanged input for a result to be used as hints
+MIN_SHARED_CLASSES = 0.5
+
+
+def digest(value):
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def class_digests(problem):
+    """Digest of each class's part of ``problem``, keyed by class id as a string."""
+    availability = problem["teacher_availability"]
+    subject_teachers = defaultdict(list)
+    for t_id, subject_ids in sorted(problem["teacher_subjects"].items()):
+        slots = availability.get(t_id)
+        teacher = [
+            t_id,
+            problem["teacher_max_hours"][t_id],
+            None if slots is None else sorted(slots),
+        ]
+        for s_id in subject_ids:
+            subject_teachers[s_id].append(teacher)
+    subject_digests = {s_id: digest(teachers) for s_id, teachers in subject_teachers.items()}
+
+    class_hours = defaultdict(list)
+    for (c_id, s_id), hrs in sorted(problem["hours_map"].items()):
+        class_hours[c_id].append(
+            [s_id, hrs, problem.get("subject_difficulty", {}).get(s_id), subject_digests.get(s_id)]
+        )
+    return {
+        str(c_id): digest([shift, class_hours[c_id]])
+        for c_id, shift in problem["class_shifts"].items()
+    }
+
+
+def problem_fingerprint(digests, engine, parameters):
+    """
+    Fingerprint of the input with class ``digests`` solved by ``engine``
+    with the solver ``parameters``. The number of search workers only
+    changes the speed, so it is left out.
+    """
+    parameters = {k: v for k, v in parameters.items() if k != "num_search_workers"}
+    return digest([engine, parameters, sorted(digests.items())])
+
+
+def cached_assignments(fingerprint):
+    """The stored assignments for ``fingerprint`` as key tuples, or None."""
+    result = SolveResult.objects.filter(fingerprint=fingerprint).first()
+    if result is None:
+        return None
+    result.save(update_fields=["used_at"])
+    return [tuple(key) for key in result.assignments]
+
+
+def near_hints(digests):
+    """
+    Lessons of the classes whose digest is unchanged, taken from the stored
+    result sharing the most class digests with ``digests``. Returns None if
+    no result shares at least ``MIN_SHARED_CLASSES`` of the classes.
+    """
+    best_pk, best_shared = None, set()
+    for pk, stored in SolveResult.objects.values_list("pk", "class_digests"):
+        shared = {c_id for c_id, value in digests.items() if stored.get(c_id) == value}
+        if len(shared) > len(best_shared):
+            best_pk, best_shared = pk, shared
+    if best_pk is None or len(best_shared) < MIN_SHARED_CLASSES * len(digests):
+        return None
+    assignments = SolveResult.objects.get(pk=best_pk).assignments
+    logger.info(f"Hinting {len(best_shared)} unchanged classes from a cached result.")
+    return [tuple(key) for key in assignments if str(key[0]) in best_shared]
+
+
+def store_result(fingerprint, digests, engine, assignments):
+    """Store ``assignments`` under ``fingerprint`` and drop the oldest results."""
+    SolveResult.objects.update_or_create(
+        fingerprint=fingerprint,
+        defaults={
+            "engine": engine,
+            "class_digests": digests,
+            "assignments": [list(key) for key in assignments],
+        },
+    )
+    stale = SolveResult.objects.values_list("pk", flat=True)[KEEP_RESULTS:]
+    SolveResult.objects.filter(pk__in=list(stale)).delete()
@@ -0,0 +1,53 @@
+"""
+Registry of schedule generation engines.
+
+An engine is a function ``solve(problem, on_solution=None)`` taking the
+plain data of ``or_tools_scheduler.load_problem`` and returning the chosen
+lessons as (c_id, s_id, t_id, d, l) keys, or None if it found no solution.
+``on_solution`` receives solver statistics, see
+``or_tools_scheduler.SolutionProgress``; a truthy return stops the search.
+"""
+
+from importlib import import_module
+
+ENGINES = {}
+
+# Modules registering engines, imported on first lookup
+ENGINE_MODULES = [
+    "schedule.or_tools_scheduler",
+    "schedule.generator.fiftyfifty",
+    "schedule.generator.interval_model",
+    "schedule.generator.or_tools_combined_final",
+    "schedule.lns",
+    "schedule.portfolio",
+]
+
+
+def register_engine(name):
+    """Decorator adding a solve function to the registry under ``name``."""
+
+    def decorator(solve):
+        ENGINES[name] = solve
+        return solve
+
+    return decorator
+
+
+def load_engines():
+    for module in ENGINE_MODULES:
+        import_module(module)
+
+
+def engine_names():
+    load_engines()
+    return sorted(ENGINES)
+
+
+def get_engine(name):
+    """Return the engine registered under ``name``; raise ValueError if none is."""
+    load_engines()
+    if name not in ENGINES:
+        raise ValueError(
+            f"Unknown engine {name!r}, expected one of: {', '.join(sorted(ENGINES))}"
+        )
+    return ENGINES[name]
@@ -1,271 +1,31 @@
-from ortools.sat.python import cp_model
-from schedule.models import SchoolClass, Subject, SubjectHours, Lesson
-from users.models import Teacher
-from django.db import transaction
-import datetime
-import random
+from schedule.engines import register_engine
+from schedule.generator.slot_model import SlotModel
+from schedule.or_tools_scheduler import WEEKDAYS
 
-DAYS = 6  # Пн–Сб (6-дневка)
-LESSONS_PER_SHIFT = {
-    "1": list(range(1, 8)),  # первая смена: уроки 1–7
-    "2": list(range(8, 14)),  # уроки 8–13
-}
+# Hard subjects a class may have per day before it is penalized
+MAX_HARD_PER_DAY = 2
 
 
-def generate_schedule():
-    model = cp_model.CpModel()
-
-    classes = list(SchoolClass.objects.select_related("grade", "study_plan").all())
-
-    subjects = list(Subject.objects.all())
-    subject_index = {s.id: i for i, s in enumerate(subjects)}
-    index_to_subject = {i: s for i, s in enumerate(subjects)}
-    FAKE_SUBJECT_INDEX = len(subjects)
-
-    teachers = list(Teacher.objects.prefetch_related("subjects").all())
-    subject_teachers = {
-        subj.id: [t for t in teachers if subj in t.subjects.all()] for subj in subjects
-    }
-
-    schedule_vars = {}
-    penalty_vars = []
-    teacher_assignment = {}
-
-    for cls in classes:
-        SubjectHours.objects.filter(school_class=cls).delete()
-        Lesson.objects.filter(school_class=cls).delete()
-
-        study_plan = cls.study_plan
-        if study_plan:
-            for row in study_plan.entries.all():
-                SubjectHours.objects.create(
-                    school_class=cls,
-                    subject=row.subject,
-                    hours_per_week=row.hours_per_week,
-                )
-
-        shift_key = str(cls.shift)
-        available_lessons = LESSONS_PER_SHIFT[shift_key]
-        available_slots = len(available_lessons) * DAYS
-        total_hours = sum(
-            p.hours_per_week for p in SubjectHours.objects.filter(school_class=cls)
-        )
-        print(
-            f"Класс {cls}: нужно {total_hours} часов, доступно {available_slots} слотов"
-        )
-
-        schedule_vars[cls.id] = {}
-
-        class_subject_ids = set(
-            p.subject.id for p in SubjectHours.objects.filter(school_class=cls)
-        )
-        allowed_subject_indexes = sorted(
-            set(subject_index[sid] for sid in class_subject_ids)
-        )
-        allowed_subject_indexes.append(FAKE_SUBJECT_INDEX)
-
-        for day in range(DAYS):
-            for lesson in available_lessons:
-                var = model.NewIntVarFromDomain(
-                    cp_model.Domain.FromValues(allowed_subject_indexes),
-                    f"class{cls.id}_d{day}_l{lesson}",
-                )
-                schedule_vars[cls.id][(day, lesson)] = var
-
-        for subj_id, hours in {
-            p.subject.id: p.hours_per_week
-            for p in SubjectHours.objects.filter(school_class=cls)
-        }.items():
-            subj_idx = subject_index[subj_id]
-            bools = []
-            for (day, lesson), var in schedule_vars[cls.id].items():
-                b = model.NewBoolVar(f"cls{cls.id}_subj{subj_id}_d{day}_l{lesson}")
-                model.Add(var == subj_idx).OnlyEnforceIf(b)
-                model.Add(var != subj_idx).OnlyEnforceIf(b.Not())
-                bools.append(b)
-            model.Add(sum(bools) == hours)
-
+class FiftyFiftyModel(SlotModel):
+    def add_preferences(self):
         # Мягкое ограничение: не более 2 сложных предметов в день
-        for day in range(DAYS):
-            hard_bools = []
-            for lesson in available_lessons:
-                var = schedule_vars[cls.id][(day, lesson)]
-                for subj in Subject.objects.filter(difficulty="hard"):
-                    if subj.id in subject_index:
-                        subj_idx = subject_index[subj.id]
-                        b = model.NewBoolVar(
-                            f"hard_cls{cls.id}_d{day}_l{lesson}_subj{subj.id}"
-                        )
-                        model.Add(var == subj_idx).OnlyEnforceIf(b)
-                        model.Add(var != subj_idx).OnlyEnforceIf(b.Not())
-                        hard_bools.append(b)
-            total_hard = model.NewIntVar(
-                0, len(hard_bools), f"total_hard_cls{cls.id}_d{day}"
-            )
-            model.Add(total_hard == sum(hard_bools))
-            excess = model.NewIntVar(
-                0, len(hard_bools), f"hard_penalty_day{day}_cls{cls.id}"
-            )
-            model.AddMaxEquality(excess, [0, total_hard - 2])
-            penalty_vars.append(excess)
-
-        # Жесткое ограничение: не ставить два сложных подряд
-        hard_subject_indexes = [
-            subject_index[s.id]
-            for s in Subject.objects.filter(difficulty="hard")
-            if s.id in subject_index
-        ]
-        for day in range(DAYS):
-            for i in range(1, len(available_lessons)):
-                prev_var = schedule_vars[cls.id][(day, available_lessons[i - 1])]
-                curr_var = schedule_vars[cls.id][(day, available_lessons[i])]
-                for hard_idx in hard_subject_indexes:
-                    b1 = model.NewBoolVar(
-                        f"hard_seq1_cls{cls.id}_d{day}_l{i}_subj{hard_idx}"
-                    )
-                    b2 = model.NewBoolVar(
-                        f"hard_seq2_cls{cls.id}_d{day}_l{i}_subj{hard_idx}"
-                    )
-                    model.Add(prev_var == hard_idx).OnlyEnforceIf(b1)
-                    model.Add(prev_var != hard_idx).OnlyEnforceIf(b1.Not())
-                    model.Add(curr_var == hard_idx).OnlyEnforceIf(b2)
-                    model.Add(curr_var != hard_idx).OnlyEnforceIf(b2.Not())
-                    model.AddBoolOr([b1.Not(), b2.Not()])
-
-        # Мягкое ограничение: легкие предметы в последние уроки дня
-        # for day in range(DAYS):
-        #     for lesson in available_lessons[:-3]:  # Не первые, но и не последние 2-3
-        #         var = schedule_vars[cls.id][(day, lesson)]
-        #         for subj in Subject.objects.filter(difficulty="easy"):
-        #             if subj.id in subject_index:
-        #                 subj_idx = subject_index[subj.id]
-        #                 b = model.NewBoolVar(f"early_easy_cls{cls.id}_d{day}_l{lesson}")
-        #                 model.Add(var == subj_idx).OnlyEnforceIf(b)
-        #                 model.Add(var != subj_idx).OnlyEnforceIf(b.Not())
-        #                 penalty_vars.append(b)
-
-        # Мягкое ограничение: избегаем окон
-        for day in range(DAYS):
-            for i in range(1, len(available_lessons)):
-                prev_lesson = available_lessons[i - 1]
-                curr_lesson = available_lessons[i]
-                prev_var = schedule_vars[cls.id][(day, prev_lesson)]
-                curr_var = schedule_vars[cls.id][(day, curr_lesson)]
-                is_curr_filled = model.NewBoolVar(
-                    f"filled_cls{cls.id}_d{day}_l{curr_lesson}"
-                )
-                is_prev_filled = model.NewBoolVar(
-                    f"filled_cls{cls.id}_d{day}_l{prev_lesson}"
-                )
-                model.Add(curr_var != FAKE_SUBJECT_INDEX).OnlyEnforceIf(is_curr_filled)
-                model.Add(curr_var == FAKE_SUBJECT_INDEX).OnlyEnforceIf(
-                    is_curr_filled.Not()
-                )
-                model.Add(prev_var != FAKE_SUBJECT_INDEX).OnlyEnforceIf(is_prev_filled)
-                model.Add(prev_var == FAKE_SUBJECT_INDEX).OnlyEnforceIf(
-                    is_prev_filled.Not()
-                )
-                model.AddImplication(is_curr_filled, is_prev_filled)
-
-        # Мягкое ограничение: избегаем 7-х уроков
-        for day in range(DAYS):
-            if 7 in available_lessons:
-                var7 = schedule_vars[cls.id][(day, 7)]
-                is_used = model.NewBoolVar(f"seventh_cls{cls.id}_d{day}")
-                model.Add(var7 != FAKE_SUBJECT_INDEX).OnlyEnforceIf(is_used)
-                model.Add(var7 == FAKE_SUBJECT_INDEX).OnlyEnforceIf(is_used.Not())
-                penalty_vars.append(is_used)
-
-    # Ограничения на занятость учителей (жесткие)
-    for day in range(DAYS):
-        for lesson_num in range(1, 14):
-            for teacher in teachers:
-                uses = []
-                for cls in classes:
-                    shift_key = str(cls.shift)
-                    if lesson_num not in LESSONS_PER_SHIFT[shift_key]:
-                        continue
-                    if (day, lesson_num) not in schedule_vars[cls.id]:
-                        continue
-
-                    var = schedule_vars[cls.id][(day, lesson_num)]
-                    for subj in teacher.subjects.all():
-                        if subj.id not in subject_index:
-                            continue
-                        idx = subject_index[subj.id]
-                        b = model.NewBoolVar(
-                            f"teacher{teacher.id}_cls{cls.id}_d{day}_l{lesson_num}"
-                        )
-                        model.Add(var == idx).OnlyEnforceIf(b)
-                        model.Add(var != idx).OnlyEnforceIf(b.Not())
-                        uses.append(b)
-                if uses:
-                    model.Add(sum(uses) <= 1)
-
-            # Жесткое ограничение: у одного класса один предмет ведёт один учитель
-            available_teachers = subject_teachers.get(subj_id, [])
-            if available_teachers:
-                teacher_vars = []
-                for teacher in available_teachers:
-                    t_var = model.NewBoolVar(
-                        f"assign_cls{cls.id}_subj{subj_id}_teacher{teacher.id}"
-                    )
-                    teacher_vars.append(t_var)
-                model.AddExactlyOne(teacher_vars)
-                teacher_assignment[(cls.id, subj_id)] = teacher_vars
-
-    # Целевая функция: минимизируем штрафы
-    model.Minimize(sum(penalty_vars))
-
-    solver = cp_model.CpSolver()
-    solver.parameters.log_search_progress = True
-    solver.parameters.num_search_workers = 1
-
-    class SolutionPrinter(cp_model.CpSolverSolutionCallback):
-        def __init__(self):
-            cp_model.CpSolverSolutionCallback.__init__(self)
-            self.solution_count = 0
-
-        def on_solution_callback(self):
-            self.solution_count += 1
-
-    printer = SolutionPrinter()
-    status = solver.Solve(model, printer)
-    print(f"Решений найдено: {printer.solution_count}")
-
-    if status not in [cp_model.FEASIBLE, cp_model.OPTIMAL]:
-        print("\n=== НЕ УДАЛОСЬ СОСТАВИТЬ РАСПИСАНИЕ ===")
-        print(f"status: {status}")
-        for cls in classes:
-            for (day, lesson), var in schedule_vars[cls.id].items():
-                print(f"  День {day + 1}, урок {lesson} → {var}")
-        raise Exception("Невозможно составить расписание")
-
-    for cls in classes:
-        for (day, lesson), var in schedule_vars[cls.id].items():
-            subj_idx = solver.Value(var)
-            if subj_idx == FAKE_SUBJECT_INDEX:
+        for c_id, slots in self.class_slots.items():
+            hard = [s_id for s_id in self.class_subjects[c_id] if s_id in self.hard]
+            if len(hard) <= MAX_HARD_PER_DAY:
                 continue
-            subject = subjects[subj_idx]
-            assigned_teacher = None
-            if (cls.id, subject.id) in teacher_assignment:
-                teacher_vars = teacher_assignment[(cls.id, subject.id)]
-                for i, t_var in enumerate(teacher_vars):
-                    if solver.BooleanValue(t_var):
-                        assigned_teacher = subject_teachers[subject.id][i]
-                        break
-                if assigned_teacher is None:
-                    raise Exception(
-                        f"❌ Не удалось назначить учителя для предмета '{subject.name}' в классе '{str(cls)}'"
-                    )
-            else:
-                raise Exception(
-                    f"❌ Нет информации о возможных учителях для предмета '{subject.name}' в классе '{str(cls)}'"
+            for d in WEEKDAYS:
+                total_hard = sum(
+                    self.is_value(c_id, d, l, s_id) for l in slots for s_id in hard
                 )
-            Lesson.objects.create(
-                school_class=cls,
-                subject=subject,
-                teacher=assigned_teacher,
-                weekday=day + 1,
-                lesson_number=lesson,
-            )
+                excess = self.model.NewIntVar(0, len(hard), f"hard_excess_c{c_id}_d{d}")
+                self.model.AddMaxEquality(excess, [0, total_hard - MAX_HARD_PER_DAY])
+                self.penalties.append(excess)
+
+
+@register_engine("fiftyfifty")
+def solve_fiftyfifty(problem, on_solution=None):
+    """
+    Subject-per-slot model with hard subjects spread over the day: never
+    two in a row, at most two a day where possible, few 7th lessons.
+    """
+    return FiftyFiftyModel(problem).build().solve(on_solution)
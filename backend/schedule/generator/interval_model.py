@@ -0,0 +1,155 @@
+from collections import defaultdict
+
+from ortools.sat.python import cp_model
+
+from schedule.engines import register_engine
+from schedule.metrics import BlockTimer
+from schedule.or_tools_scheduler import (
+    WEEKDAYS,
+    candidate_teachers,
+    run_solver,
+    slots_for_shift,
+)
+
+
+class IntervalModel:
+    """
+    Compact formulation of the joint model.
+
+    A subject is taught at most once a day, so each (class, subject, day)
+    gets one slot variable ``p`` and a ``present`` literal instead of a
+    boolean per slot and teacher. Lessons are unit intervals at ``p``:
+    a class and a teacher each get one no-overlap constraint per day, and
+    a teacher's interval is present only for the class-subjects assigned to
+    them by ``assign``. No gaps is a bound: a class with n lessons on a day
+    uses exactly its first n slots.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.model = cp_model.CpModel()
+        self.p = {}
+        self.present = {}
+        self.assign = {}
+        self.teaches = {}
+
+    def build(self):
+        model = self.model
+        problem = self.problem
+        availability = problem.get("teacher_availability") or {}
+        candidates = candidate_teachers(
+            problem["class_shifts"], problem["hours_map"], problem["teacher_subjects"], availability
+        )
+        class_subjects = defaultdict(list)
+        class_day = defaultdict(list)
+        teacher_day = defaultdict(list)
+        teacher_week = defaultdict(list)
+        blocks = BlockTimer(model, "IntervalModel")
+
+        # Slot of each (class, subject, day) and the hours per plan
+        for (c_id, s_id), hrs in problem["hours_map"].items():
+            slots = slots_for_shift(problem["class_shifts"][c_id])
+            class_subjects[c_id].append(s_id)
+            for d in WEEKDAYS:
+                present = model.NewBoolVar(f"present_c{c_id}_s{s_id}_d{d}")
+                p = model.NewIntVar(slots[0], slots[-1], f"p_c{c_id}_s{s_id}_d{d}")
+                self.present[(c_id, s_id, d)] = present
+                self.p[(c_id, s_id, d)] = p
+                class_day[(c_id, d)].append(
+                    model.NewOptionalFixedSizeIntervalVar(p, 1, present, f"lesson_c{c_id}_s{s_id}_d{d}")
+                )
+            model.Add(sum(self.present[(c_id, s_id, d)] for d in WEEKDAYS) == hrs)
+
+            # One teacher per class-subject, present on the days it is taught
+            a_vars = []
+            for t_id in candidates[(c_id, s_id)]:
+                a = model.NewBoolVar(f"a_c{c_id}_s{s_id}_t{t_id}")
+                self.assign[(c_id, s_id, t_id)] = a
+                a_vars.append(a)
+                open_slots = availability.get(t_id)
+                for d in WEEKDAYS:
+                    closed = [
+                        l for l in slots if open_slots is not None and (d, l) not in open_slots
+                    ]
+                    if len(closed) == len(slots):
+                        model.AddBoolOr([a.Not(), self.present[(c_id, s_id, d)].Not()])
+                        continue
+                    teaches = model.NewBoolVar(f"teaches_c{c_id}_s{s_id}_t{t_id}_d{d}")
+                    model.AddBoolAnd([a, self.present[(c_id, s_id, d)]]).OnlyEnforceIf(teaches)
+                    model.AddBoolOr([a.Not(), self.present[(c_id, s_id, d)].Not(), teaches])
+                    for l in closed:
+                        model.Add(self.p[(c_id, s_id, d)] != l).OnlyEnforceIf(teaches)
+                    self.teaches[(c_id, s_id, t_id, d)] = teaches
+                    teacher_day[(t_id, d)].append(
+                        model.NewOptionalFixedSizeIntervalVar(
+                            self.p[(c_id, s_id, d)], 1, teaches, f"teach_c{c_id}_s{s_id}_t{t_id}_d{d}"
+                        )
+                    )
+                    teacher_week[t_id].append(teaches)
+            model.AddExactlyOne(a_vars)
+        blocks.lap("lessons")
+
+        # One lesson at a time for classes and teachers, weekly load
+        for intervals in class_day.values():
+            model.AddNoOverlap(intervals)
+        for intervals in teacher_day.values():
+            if len(intervals) > 1:
+                model.AddNoOverlap(intervals)
+        for t_id, week_vars in teacher_week.items():
+            model.Add(sum(week_vars) <= problem["teacher_max_hours"][t_id])
+        blocks.lap("no_overlap")
+
+        # No gaps: n lessons fill the first n slots of the shift, and balance
+        Lmax = {}
+        Lmin = {}
+        for c_id, shift in problem["class_shifts"].items():
+            slots = slots_for_shift(shift)
+            subject_ids = class_subjects[c_id]
+            Lmax[c_id] = model.NewIntVar(0, len(slots), f"Lmax_c{c_id}")
+            Lmin[c_id] = model.NewIntVar(0, len(slots), f"Lmin_c{c_id}")
+            for d in WEEKDAYS:
+                lessons = sum(self.present[(c_id, s_id, d)] for s_id in subject_ids)
+                for s_id in subject_ids:
+                    model.Add(self.p[(c_id, s_id, d)] <= slots[0] - 1 + lessons).OnlyEnforceIf(
+                        self.present[(c_id, s_id, d)]
+                    )
+                model.Add(lessons <= Lmax[c_id])
+                model.Add(lessons >= Lmin[c_id])
+        model.Minimize(sum(Lmax[c_id] - Lmin[c_id] for c_id in Lmax))
+        blocks.lap("no_gaps")
+
+        if problem.get("hints"):
+            self.add_hints(problem["hints"])
+        blocks.lap("warm_start")
+        return self
+
+    def add_hints(self, lessons):
+        """Hint a previous schedule for the class-subjects it covered."""
+        placed = {(c_id, s_id, d): l for c_id, s_id, t_id, d, l in lessons}
+        taught = {(c_id, s_id, t_id) for c_id, s_id, t_id, d, l in lessons}
+        covered = {(c_id, s_id) for c_id, s_id, t_id in taught}
+        for key, present in self.present.items():
+            if key[:2] in covered:
+                self.model.AddHint(present, key in placed)
+                if key in placed:
+                    self.model.AddHint(self.p[key], placed[key])
+        for key, var in self.assign.items():
+            if key[:2] in covered:
+                self.model.AddHint(var, key in taught)
+
+    def solve(self, on_solution=None):
+        """Return the chosen (c_id, s_id, t_id, d, l) keys, or None."""
+        solver, status = run_solver(self.model, on_solution, self.problem.get("solver"))
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+        return [
+            (c_id, s_id, t_id, d, solver.Value(self.p[(c_id, s_id, d)]))
+            for (c_id, s_id, t_id, d), var in self.teaches.items()
+            if solver.Value(var)
+        ]
+
+
+@register_engine("compact")
+def solve_compact(problem, on_solution=None):
+    """The joint model in the compact interval formulation."""
+    return IntervalModel(problem).build().solve(on_solution)
@@ -0,0 +1,193 @@
+from collections import defaultdict
+
+from ortools.sat.python import cp_model
+
+from schedule.metrics import BlockTimer
+from schedule.models import DifficultyLevel
+from schedule.or_tools_scheduler import (
+    WEEKDAYS,
+    candidate_teachers,
+    run_solver,
+    slots_for_shift,
+)
+
+# Value of a slot variable with no lesson; subject ids start at 1
+EMPTY = 0
+
+
+class SlotModel:
+    """
+    Subject-per-slot formulation shared by the difficulty-aware engines.
+
+    Every (class, day, slot) gets one integer variable whose value is the id
+    of the subject taught there, or ``EMPTY``. Teachers are chosen per
+    (class, subject) by ``assign`` booleans and occupy a slot through the
+    ``busy`` booleans. Subclasses add their soft constraints to
+    ``penalties`` in ``add_preferences``, taking "slot holds value"
+    literals from ``is_value`` so that each is reified only once.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.model = cp_model.CpModel()
+        self.class_slots = {
+            c_id: slots_for_shift(shift)
+            for c_id, shift in problem["class_shifts"].items()
+        }
+        self.class_subjects = defaultdict(list)
+        for c_id, s_id in problem["hours_map"]:
+            self.class_subjects[c_id].append(s_id)
+        difficulty = problem.get("subject_difficulty", {})
+        self.hard = {s_id for s_id, level in difficulty.items() if level == DifficultyLevel.HARD}
+        self.easy = {s_id for s_id, level in difficulty.items() if level == DifficultyLevel.EASY}
+
+        self.x = {}
+        self.literals = {}
+        self.assign = {}
+        self.busy = {}
+        self.penalties = []
+
+    def build(self):
+        blocks = BlockTimer(self.model, type(self).__name__)
+        self.add_slots()
+        blocks.lap("slots")
+        self.add_plan_hours()
+        blocks.lap("plan_hours")
+        self.add_teachers()
+        blocks.lap("teachers")
+        self.add_no_gaps()
+        blocks.lap("no_gaps")
+        self.add_hard_sequence()
+        blocks.lap("hard_sequence")
+        self.add_preferences()
+        blocks.lap("preferences")
+        self.model.Minimize(sum(self.penalties))
+        if self.problem.get("hints"):
+            self.add_hints(self.problem["hints"])
+        blocks.lap("warm_start")
+        return self
+
+    def is_value(self, c_id, d, l, value):
+        """Literal for "slot (c_id, d, l) holds ``value``", created on first use."""
+        key = (c_id, d, l, value)
+        if key not in self.literals:
+            var = self.x[(c_id, d, l)]
+            b = self.model.NewBoolVar(f"is_c{c_id}_d{d}_l{l}_v{value}")
+            self.model.Add(var == value).OnlyEnforceIf(b)
+            self.model.Add(var != value).OnlyEnforceIf(b.Not())
+            self.literals[key] = b
+        return self.literals[key]
+
+    def add_slots(self):
+        # Subject of each slot, EMPTY if there is no lesson
+        for c_id, slots in self.class_slots.items():
+            domain = cp_model.Domain.FromValues([EMPTY] + sorted(self.class_subjects[c_id]))
+            for d in WEEKDAYS:
+                for l in slots:
+                    self.x[(c_id, d, l)] = self.model.NewIntVarFromDomain(
+                        domain, f"x_c{c_id}_d{d}_l{l}"
+                    )
+
+    def add_plan_hours(self):
+        # Hours per plan, at most one lesson of a subject per day
+        for (c_id, s_id), hrs in self.problem["hours_map"].items():
+            slots = self.class_slots[c_id]
+            self.model.Add(
+                sum(self.is_value(c_id, d, l, s_id) for d in WEEKDAYS for l in slots) == hrs
+            )
+            for d in WEEKDAYS:
+                daily = sum(self.is_value(c_id, d, l, s_id) for l in slots)
+                self.model.Add(daily <= 1)
+                if hrs == len(WEEKDAYS):
+                    self.model.Add(daily == 1)
+
+    def add_teachers(self):
+        problem = self.problem
+        availability = problem["teacher_availability"]
+        candidates = candidate_teachers(
+            problem["class_shifts"],
+            problem["hours_map"],
+            problem["teacher_subjects"],
+            availability,
+        )
+        by_teacher_slot = defaultdict(list)
+        by_teacher = defaultdict(list)
+        for (c_id, s_id), t_ids in candidates.items():
+            a_vars = []
+            for t_id in t_ids:
+                a = self.model.NewBoolVar(f"a_c{c_id}_s{s_id}_t{t_id}")
+                self.assign[(c_id, s_id, t_id)] = a
+                a_vars.append(a)
+                open_slots = availability.get(t_id)
+                for d in WEEKDAYS:
+                    for l in self.class_slots[c_id]:
+                        is_subj = self.is_value(c_id, d, l, s_id)
+                        if open_slots is not None and (d, l) not in open_slots:
+                            self.model.AddBoolOr([is_subj.Not(), a.Not()])
+                            continue
+                        busy = self.model.NewBoolVar(f"busy_c{c_id}_s{s_id}_t{t_id}_d{d}_l{l}")
+                        self.model.AddBoolOr([is_subj.Not(), a.Not(), busy])
+                        self.model.AddImplication(busy, a)
+                        self.model.AddImplication(busy, is_subj)
+                        self.busy[(c_id, s_id, t_id, d, l)] = busy
+                        by_teacher_slot[(t_id, d, l)].append(busy)
+                        by_teacher[t_id].append(busy)
+            self.model.AddExactlyOne(a_vars)
+
+        for t_vars in by_teacher_slot.values():
+            if len(t_vars) > 1:
+                self.model.Add(sum(t_vars) <= 1)
+        for t_id, week_vars in by_teacher.items():
+            self.model.Add(sum(week_vars) <= problem["teacher_max_hours"][t_id])
+
+    def add_no_gaps(self):
+        # A filled slot needs the previous one filled; the 7th lesson is penalized
+        for c_id, slots in self.class_slots.items():
+            for d in WEEKDAYS:
+                filled = []
+                for l in slots:
+                    b = self.is_value(c_id, d, l, EMPTY).Not()
+                    filled.append(b)
+                    if l == 7:
+                        self.penalties.append(b)
+                for prev, curr in zip(filled, filled[1:]):
+                    self.model.AddImplication(curr, prev)
+
+    def add_hard_sequence(self):
+        # No two hard subjects in a row
+        for c_id, slots in self.class_slots.items():
+            hard = [s_id for s_id in self.class_subjects[c_id] if s_id in self.hard]
+            if not hard:
+                continue
+            for d in WEEKDAYS:
+                for prev, curr in zip(slots, slots[1:]):
+                    self.model.Add(
+                        sum(self.is_value(c_id, d, prev, s_id) for s_id in hard)
+                        + sum(self.is_value(c_id, d, curr, s_id) for s_id in hard)
+                        <= 1
+                    )
+
+    def add_preferences(self):
+        pass
+
+    def add_hints(self, lessons):
+        """
+        Hint the slots and teachers of a previous schedule, for the classes
+        it covered.
+        """
+        placed = {(c_id, d, l): s_id for c_id, s_id, t_id, d, l in lessons}
+        taught = {(c_id, s_id, t_id) for c_id, s_id, t_id, d, l in lessons}
+        covered = {c_id for c_id, d, l in placed}
+        for key, var in self.x.items():
+            if key[0] in covered:
+                self.model.AddHint(var, placed.get(key, EMPTY))
+        for key, var in self.assign.items():
+            if key[0] in covered:
+                self.model.AddHint(var, key in taught)
+
+    def solve(self, on_solution=None):
+        """Return the chosen (c_id, s_id, t_id, d, l) keys, or None."""
+        solver, status = run_solver(self.model, on_solution, self.problem.get("solver"))
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+        return [key for key, var in self.busy.items() if solver.Value(var)]
@@ -0,0 +1,211 @@
+import datetime
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from schedule.metrics import RunRecord
+from schedule.models import GenerationJob, JobKind, JobStatus
+from schedule.or_tools_scheduler import generate_schedule, init_worker, reschedule
+
+logger = logging.getLogger(__name__)
+
+# Generation and rescheduling jobs rewrite the active timetable, so they
+# must run one after another. The queue is the GenerationJob table: a job is only claimed
+# while no other job runs, in any web process, see ``claim_job``.
+MAX_WORKERS = 1
+
+# A running job marks itself alive this often; one silent for
+# ORPHAN_AFTER lost its worker, on whatever host it ran
+HEARTBEAT_SECONDS = 30
+ORPHAN_AFTER = datetime.timedelta(minutes=5)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=init_worker)
+    return _executor
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def is_orphan(job):
+    """
+    True if ``job`` is marked running by a process that is gone: one of
+    this host, or any whose heartbeat stopped ``ORPHAN_AFTER`` ago.
+    """
+    last_seen = job.heartbeat_at or job.started_at
+    if last_seen is None or last_seen < timezone.now() - ORPHAN_AFTER:
+        return True
+    host, _, pid = job.worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def claim_job():
+    """
+    Mark the oldest unfinished job as running in this process and return
+    its id. Returns None if the queue is empty or its oldest job is still
+    running. The oldest job is locked while it is claimed, so concurrent
+    claims wait for each other and see it running. Jobs left running by
+    a process that is gone are failed on the way.
+    """
+    while True:
+        with transaction.atomic():
+            job = (
+                GenerationJob.objects.select_for_update()
+                .filter(status__in=[JobStatus.QUEUED, JobStatus.RUNNING])
+                .order_by("pk")
+                .first()
+            )
+            if job is None:
+                return None
+            if job.status == JobStatus.QUEUED:
+                job.status = JobStatus.RUNNING
+                job.started_at = job.heartbeat_at = timezone.now()
+                job.worker = worker_name()
+                job.save(update_fields=["status", "started_at", "heartbeat_at", "worker"])
+                return job.pk
+            if not is_orphan(job):
+                return None
+            logger.warning(f"Generation job {job.pk} lost its worker {job.worker}.")
+            job.status = JobStatus.FAILED
+            job.error = "Процесс генерации был прерван."
+            job.finished_at = timezone.now()
+            job.save(update_fields=["status", "error", "finished_at"])
+
+
+def set_stage(job_id, stage):
+    GenerationJob.objects.filter(pk=job_id).update(stage=stage)
+
+
+def record_solution(job_id, stats):
+    """
+    Store solver statistics on the job. Returns True once a stop was
+    requested, which makes the solver end the search.
+    """
+    try:
+        GenerationJob.objects.filter(pk=job_id).update(**stats)
+        return GenerationJob.objects.filter(pk=job_id, stop_requested=True).exists()
+    finally:
+        # Called from solver threads, whose connections are never reused
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+
+@contextmanager
+def heartbeat(job_id):
+    """Mark the job alive every ``HEARTBEAT_SECONDS`` while the block runs."""
+    done = threading.Event()
+
+    def beat():
+        try:
+            while not done.wait(HEARTBEAT_SECONDS):
+                GenerationJob.objects.filter(pk=job_id).update(heartbeat_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def run_job(job_id):
+    """Run a claimed generation or rescheduling job inside a worker process."""
+    job = GenerationJob.objects.get(pk=job_id)
+    record = RunRecord()
+    callbacks = {
+        "profile": job.profile,
+        "on_progress": lambda stage: set_stage(job_id, stage),
+        "on_solution": partial(record_solution, job_id),
+        "record": record,
+    }
+    try:
+        with heartbeat(job_id):
+            if job.kind == JobKind.RESCHEDULE:
+                reschedule(**job.options, **callbacks)
+            else:
+                generate_schedule(engine=job.engine, **callbacks)
+    except Exception as e:
+        logger.exception(f"Generation job {job_id} failed")
+        job.status = JobStatus.FAILED
+        job.error = str(e)
+    else:
+        job.status = JobStatus.SUCCEEDED
+    job.finished_at = timezone.now()
+    job.metrics = record.as_dict()
+    job.save(update_fields=["status", "error", "finished_at", "metrics"])
+
+
+def run_jobs():
+    """Run queued jobs one after another until none is left to claim."""
+    while (job_id := claim_job()) is not None:
+        run_job(job_id)
+
+
+def _on_done(future):
+    global _executor
+    # run_job records its own failures; a crashed worker breaks the pool,
+    # and its job is failed as an orphan by the next claim
+    if future.exception() is not None:
+        logger.error(f"Generation worker crashed: {future.exception()}")
+        _executor = None
+
+
+def start_worker():
+    """Have the worker pool run the queue."""
+    # Connections must not be shared with a worker forked on submit
+    connections.close_all()
+    get_executor().submit(run_jobs).add_done_callback(_on_done)
+
+
+def enqueue_generation(engine="joint", profile="balanced"):
+    """
+    Create a generation job and have the worker pool run the queue. The
+    job waits if another one is running; that one's worker picks it up.
+    """
+    job = GenerationJob.objects.create(engine=engine, profile=profile)
+    start_worker()
+    return job
+
+
+def enqueue_reschedule(profile="balanced", **options):
+    """
+    Create a rescheduling job with the ``options`` of
+    ``or_tools_scheduler.reschedule`` (lists of ids) and run it like a
+    generation job.
+    """
+    job = GenerationJob.objects.create(
+        kind=JobKind.RESCHEDULE, profile=profile, options=options
+    )
+    start_worker()
+    return job
+
+
+def request_stop(job_id):
+    """Ask a running job to keep its best solution so far and finish."""
+    return GenerationJob.objects.filter(
+        pk=job_id, status__in=[JobStatus.QUEUED, JobStatus.RUNNING]
+    ).update(stop_requested=True)
@@ -0,0 +1,165 @@
+import logging
+import random
+import time
+
+from ortools.sat.python import cp_model
+
+from schedule.engines import register_engine
+from schedule.models import Lesson, ScheduleVersion
+from schedule.or_tools_scheduler import (
+    WEEKDAYS,
+    balance,
+    build_model,
+    load_problem,
+    place_rooms,
+    run_solver,
+    validate_problem,
+)
+from schedule.persistence import active_version, apply_changes, save_version
+from schedule.profiles import make_solver, solver_parameters
+
+logger = logging.getLogger(__name__)
+
+NEIGHBOURHOODS = ("days", "teacher", "grade")
+
+
+def pick_neighbourhood(kind, problem, incumbent, rnd):
+    """
+    Predicate over y keys (c_id, s_id, t_id, d, l) that are freed:
+    two random days, the classes and subjects of one random teacher, or
+    all classes of one grade.
+    """
+    if kind == "days":
+        days = set(rnd.sample(WEEKDAYS, 2))
+        return lambda key: key[3] in days
+    if kind == "teacher":
+        t_id = rnd.choice(sorted({key[2] for key in incumbent}))
+        freed = {(c_id, s_id) for c_id, s_id, tt_id, d, l in incumbent if tt_id == t_id}
+        return lambda key: key[:2] in freed
+    grade = rnd.choice(sorted(set(problem["class_grades"].values())))
+    return lambda key: problem["class_grades"].get(key[0]) == grade
+
+
+def improve(
+    problem, incumbent, time_limit=60, neighbourhood_time=5, seed=None, on_solution=None
+):
+    """
+    Large Neighbourhood Search over the joint model. Starting from the
+    ``incumbent`` assignments, repeatedly free a random neighbourhood (see
+    ``pick_neighbourhood``), fix every other lesson and re-solve for at most
+    ``neighbourhood_time`` seconds, keeping the result if the balance does
+    not get worse. Stops after ``time_limit`` seconds of wall-clock time or
+    once the balance is 0. Each improvement is reported to ``on_solution``
+    like ``SolutionProgress`` does; a truthy return stops the search.
+    Returns the best assignments found.
+    """
+    model, reg = build_model(problem)
+    rnd = random.Random(seed)
+    best = list(incumbent)
+    best_objective = balance(best, problem["class_shifts"])
+    started = time.monotonic()
+    deadline = started + time_limit
+    iterations = accepted = 0
+    logger.info(f"LNS starts from balance {best_objective}")
+
+    while best_objective > 0 and time.monotonic() < deadline:
+        iterations += 1
+        kind = rnd.choice(NEIGHBOURHOODS)
+        freed = pick_neighbourhood(kind, problem, best, rnd)
+        chosen = set(best)
+
+        sub = model.Clone()
+        sub.ClearHints()
+        for key, var in reg.y.items():
+            value = key in chosen
+            sub_var = sub.GetBoolVarFromProtoIndex(var.Index())
+            if freed(key):
+                sub.AddHint(sub_var, value)
+            else:
+                sub.Add(sub_var == value)
+
+        solver = make_solver(
+            problem.get("solver"),
+            max_time_in_seconds=min(neighbourhood_time, max(0.1, deadline - time.monotonic())),
+            stop_after_first_solution=False,
+        )
+        status = solver.Solve(sub)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            continue
+        candidate = [key for key, var in reg.y.items() if solver.Value(var)]
+        objective = balance(candidate, problem["class_shifts"])
+        if objective > best_objective:
+            continue
+        accepted += 1
+        improved = objective < best_objective
+        best, best_objective = candidate, objective
+        if improved:
+            logger.info(f"LNS {kind} neighbourhood: balance down to {objective}")
+            stats = {
+                "objective": objective,
+                "best_bound": 0,
+                "gap": 1.0 if objective else 0.0,
+                "elapsed": time.monotonic() - started,
+                "solution_count": accepted,
+            }
+            if on_solution is not None and on_solution(stats):
+                logger.info("Search stopped on request.")
+                break
+
+    if not accepted:
+        logger.warning("LNS could not re-solve any neighbourhood of the incumbent.")
+    logger.info(f"LNS finished after {iterations} neighbourhoods with balance {best_objective}")
+    return best
+
+
+@register_engine("lns")
+def solve_lns(problem, on_solution=None):
+    """
+    Find a first feasible timetable with the joint model, then spend the
+    rest of the solver time limit improving it with ``improve``.
+    """
+    started = time.monotonic()
+    parameters = problem.get("solver") or solver_parameters()
+    time_limit = parameters["max_time_in_seconds"]
+    model, reg = build_model(problem)
+    solver, status = run_solver(
+        model, on_solution, dict(parameters, stop_after_first_solution=True)
+    )
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    first = [key for key, var in reg.y.items() if solver.Value(var)]
+    if status == cp_model.OPTIMAL:
+        return first
+    return improve(
+        problem,
+        first,
+        time_limit=time_limit - (time.monotonic() - started),
+        on_solution=on_solution,
+    )
+
+
+def improve_schedule(version_id=None, time_limit=60, seed=None, profile=None):
+    """
+    Resume improving a stored timetable: the active version, or the one
+    with ``version_id``. The active version is updated in place, any other
+    version is improved into a new active version. ``profile`` names the
+    solver parameters of each neighbourhood, see ``schedule.profiles``.
+    Returns the ``ChangeSet`` or the new ``ScheduleVersion``.
+    """
+    active = active_version()
+    version = ScheduleVersion.objects.get(pk=version_id) if version_id else active
+    if version is None:
+        raise Exception("No stored schedule to improve.")
+    incumbent = list(
+        Lesson.objects.filter(version=version).values_list(
+            "school_class_id", "subject_id", "teacher_id", "weekday", "lesson_number"
+        )
+    )
+    problem, snapshot = load_problem()
+    problem["solver"] = solver_parameters(profile)
+    validate_problem(problem, snapshot)
+    improved = improve(problem, incumbent, time_limit=time_limit, seed=seed)
+    improved, rooms = place_rooms(problem, improved)
+    if active is not None and version.pk == active.pk:
+        return apply_changes(improved, rooms)
+    return save_version(improved, rooms, note=f"LNS from #{version.pk}")
@@ -0,0 +1,134 @@
+"""
+Measurements of a schedule generation run.
+
+A ``RunRecord`` made current with ``recording`` collects timing spans of
+the generation steps and of the blocks of a model build (``BlockTimer``),
+and the statistics of every model solved by ``or_tools_scheduler.run_solver``
+in this process.
+Engines solving in other processes ("shifts", "portfolio") only show up
+in the span around them. The record is logged as one JSON line when the
+run ends.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("run_record", default=None)
+
+
+def proto_size(model):
+    """
+    Size of the serialized model in bytes. Writes the model to a temporary
+    file, so it is only measured on request (benchmark_model_build); run
+    records count variables and constraints instead.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pb")
+    try:
+        model.ExportToFile(path)
+        return os.path.getsize(path)
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+
+class RunRecord:
+    def __init__(self):
+        self.spans = []
+        self.models = []
+        self.path = []
+
+    @contextmanager
+    def span(self, name):
+        """Time the block as a span nested in the enclosing ones."""
+        self.path.append(name)
+        entry = {"name": "/".join(self.path), "seconds": None}
+        self.spans.append(entry)
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = time.perf_counter() - started
+            self.path.pop()
+
+    def add_span(self, name, seconds, **stats):
+        self.spans.append({"name": "/".join(self.path + [name]), "seconds": seconds, **stats})
+
+    def add_model(self, model, solver, status):
+        proto = model.Proto()
+        found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        self.models.append(
+            {
+                "variables": len(proto.variables),
+                "constraints": len(proto.constraints),
+                "status": solver.StatusName(status),
+                "objective": solver.ObjectiveValue() if found else None,
+                "solve_seconds": solver.WallTime(),
+            }
+        )
+
+    def total(self, field):
+        return sum(stats[field] for stats in self.models)
+
+    def as_dict(self):
+        return {"spans": self.spans, "models": self.models}
+
+
+class BlockTimer:
+    """
+    Times the consecutive blocks of a model build: ``lap(name)`` records
+    the time since the previous lap as a span, with the number of
+    variables and constraints the block added. Does nothing unless a
+    record is current.
+    """
+
+    def __init__(self, model, name):
+        self.model = model
+        self.record = current_record()
+        if self.record is not None:
+            self.prefix = name
+            self.last = time.perf_counter()
+            self.sizes = self.model_sizes()
+
+    def model_sizes(self):
+        proto = self.model.Proto()
+        return len(proto.variables), len(proto.constraints)
+
+    def lap(self, name):
+        if self.record is None:
+            return
+        now = time.perf_counter()
+        sizes = self.model_sizes()
+        self.record.add_span(
+            f"{self.prefix}/{name}",
+            now - self.last,
+            variables=sizes[0] - self.sizes[0],
+            constraints=sizes[1] - self.sizes[1],
+        )
+        self.last = time.perf_counter()
+        self.sizes = sizes
+
+
+def current_record():
+    """The ``RunRecord`` of the running generation, or None."""
+    return _current.get()
+
+
+@contextmanager
+def recording(record):
+    """Make ``record`` current for the duration of the block, then log it."""
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+        logger.info(f"Run record: {json.dumps(record.as_dict())}")
+
@@ -0,0 +1,46 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("schedule", "0004_generationjob_progress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("note", models.CharField(blank=True, max_length=200)),
+                ("is_active", models.BooleanField(default=False)),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="scheduleversion",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_active", True)),
+                fields=("is_active",),
+                name="single_active_schedule_version",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="lesson",
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="version",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="lessons",
+                to="schedule.scheduleversion",
+            ),
+        ),
+    ]
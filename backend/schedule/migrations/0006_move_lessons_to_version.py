@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def move_lessons_to_version(apps, schema_editor):
+    ScheduleVersion = apps.get_model("schedule", "ScheduleVersion")
+    Lesson = apps.get_model("schedule", "Lesson")
+    lessons = Lesson.objects.filter(version__isnull=True)
+    if lessons.exists():
+        version = ScheduleVersion.objects.create(note="initial", is_active=True)
+        lessons.update(version=version)
+
+
+class Migration(migrations.Migration):
+    # Data only: PostgreSQL cannot alter a table with pending deferred
+    # foreign key checks in the same transaction
+
+    dependencies = [
+        ("schedule", "0005_scheduleversion"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_lessons_to_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("schedule", "0006_move_lessons_to_version"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lesson",
+            name="version",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="lessons",
+                to="schedule.scheduleversion",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="lesson",
+            unique_together={("version", "school_class", "weekday", "lesson_number")},
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0007_lesson_version_required'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='generationjob',
+            old_name='strategy',
+            new_name='engine',
+        ),
+    ]
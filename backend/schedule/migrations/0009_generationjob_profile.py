@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0008_rename_generationjob_strategy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='profile',
+            field=models.CharField(default='balanced', max_length=20),
+        ),
+    ]
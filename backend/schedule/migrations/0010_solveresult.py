@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0009_generationjob_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolveResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('engine', models.CharField(max_length=20)),
+                ('class_digests', models.JSONField(default=dict)),
+                ('assignments', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('used_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-used_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0010_solveresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='metrics',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
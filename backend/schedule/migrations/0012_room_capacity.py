@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0011_generationjob_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='capacity',
+            field=models.PositiveSmallIntegerField(default=30),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='subjects',
+            field=models.ManyToManyField(blank=True, related_name='rooms', to='schedule.subject'),
+        ),
+        migrations.AddField(
+            model_name='schoolclass',
+            name='students',
+            field=models.PositiveSmallIntegerField(default=25),
+        ),
+    ]
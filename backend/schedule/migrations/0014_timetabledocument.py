@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0013_holidaycalendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimetableDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('class', 'Класс'), ('teacher', 'Учитель')], max_length=10)),
+                ('owner_id', models.PositiveBigIntegerField()),
+                ('body', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='schedule.scheduleversion')),
+            ],
+            options={
+                'unique_together': {('kind', 'owner_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0014_timetabledocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='worker',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0015_generationjob_worker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('previous', models.JSONField(default=list)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='schedule.scheduleversion')),
+            ],
+            options={
+                'ordering': ['-pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0016_schedulechange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='kind',
+            field=models.CharField(choices=[('generate', 'Генерация'), ('reschedule', 'Перепланирование')], default='generate', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='options',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0018_generationjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='member',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
@@ -73,6 +73,7 @@ class SchoolClass(models.Model):
     study_plan = models.ForeignKey(
         StudyPlan, on_delete=models.SET_NULL, null=True, blank=True
     )
+    students = models.PositiveSmallIntegerField(default=25)
 
     class Meta:
         unique_together = ("grade", "letter")
@@ -83,6 +84,10 @@ class SchoolClass(models.Model):
 
 class Room(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    capacity = models.PositiveSmallIntegerField(default=30)
+    # Subjects the room is equipped for; a room without any is a general
+    # classroom for subjects that have no rooms of their own
+    subjects = models.ManyToManyField(Subject, blank=True, related_name="rooms")
 
     def __str__(self):
         return self.name
@@ -97,7 +102,84 @@ class SubjectHours(models.Model):
         unique_together = ("school_class", "subject")
 
 
+class ScheduleVersion(models.Model):
+    """
+    One generated timetable. Exactly one version is active; readers only
+    see lessons of the active version. A version saved in full replaces
+    the active one only once it is written; regenerating the active
+    version changes it in place and keeps a ``ScheduleChange`` to undo.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    note = models.CharField(max_length=200, blank=True)
+    is_active = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["is_active"],
+                condition=models.Q(is_active=True),
+                name="single_active_schedule_version",
+            )
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.created_at:%d.%m.%Y %H:%M}"
+
+
+class ScheduleChange(models.Model):
+    """
+    Reverse of one in-place change of a version: the lessons it touched
+    as they were before, see schedule.persistence.undo_change.
+    """
+
+    version = models.ForeignKey(
+        ScheduleVersion, on_delete=models.CASCADE, related_name="changes"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # [[class_id, weekday, lesson_number], [subject_id, teacher_id, room_id]
+    # or None where there was no lesson] lists
+    previous = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ["-pk"]
+
+    def __str__(self):
+        return f"{self.version} {self.created_at:%d.%m.%Y %H:%M}"
+
+
+class SolveResult(models.Model):
+    """
+    Assignments found for one solver input, stored under its fingerprint
+    so that an unchanged input is not solved twice, see schedule.cache.
+    """
+
+    fingerprint = models.CharField(max_length=64, unique=True)
+    engine = models.CharField(max_length=20)
+    # Digest of each class's part of the input, keyed by class id
+    class_digests = models.JSONField(default=dict)
+    # (class_id, subject_id, teacher_id, weekday, lesson_number) lists
+    assignments = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    used_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-used_at"]
+
+    def __str__(self):
+        return f"{self.engine} {self.fingerprint[:12]}"
+
+
+class LessonQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(version__is_active=True)
+
+
 class Lesson(models.Model):
+    version = models.ForeignKey(
+        ScheduleVersion, on_delete=models.CASCADE, related_name="lessons"
+    )
     school_class = models.ForeignKey(SchoolClass, on_delete=models.CASCADE)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     teacher = models.ForeignKey("users.Teacher", on_delete=models.CASCADE)
@@ -105,8 +187,10 @@ class Lesson(models.Model):
     lesson_number = models.PositiveSmallIntegerField()  # 1–7
     room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True)
 
+    objects = LessonQuerySet.as_manager()
+
     class Meta:
-        unique_together = ("school_class", "weekday", "lesson_number")
+        unique_together = ("version", "school_class", "weekday", "lesson_number")
 
     def __str__(self):
         return f"{self.school_class} - {self.subject} ({self.weekday}/{self.lesson_number})"
@@ -118,3 +202,91 @@ class Holiday(models.Model):
 
     def __str__(self):
         return self.date.strftime("%d.%m.%Y")
+
+
+class HolidayCalendar(models.Model):
+    """
+    Holidays of one academic year as a bitmap, bit ``i`` set if the
+    ``i``-th day from September 1 is a holiday, see schedule.school_calendar.
+    """
+
+    year = models.PositiveSmallIntegerField(unique=True)
+    bitmap = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.year}/{self.year + 1}"
+
+
+class TimetableKind(models.TextChoices):
+    CLASS = "class", "Класс"
+    TEACHER = "teacher", "Учитель"
+
+
+class TimetableDocument(models.Model):
+    """
+    Timetable of one class or teacher in the active version, stored as
+    the JSON the read API returns, see schedule.timetables.
+    """
+
+    kind = models.CharField(max_length=10, choices=TimetableKind.choices)
+    owner_id = models.PositiveBigIntegerField()
+    version = models.ForeignKey(ScheduleVersion, on_delete=models.CASCADE)
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("kind", "owner_id")
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.owner_id}"
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = "queued", "В очереди"
+    RUNNING = "running", "Выполняется"
+    SUCCEEDED = "succeeded", "Готово"
+    FAILED = "failed", "Ошибка"
+
+
+class JobKind(models.TextChoices):
+    GENERATE = "generate", "Генерация"
+    RESCHEDULE = "reschedule", "Перепланирование"
+
+
+class GenerationJob(models.Model):
+    kind = models.CharField(max_length=20, choices=JobKind.choices, default=JobKind.GENERATE)
+    engine = models.CharField(max_length=20, default="joint")
+    # Arguments of or_tools_scheduler.reschedule for RESCHEDULE jobs
+    options = models.JSONField(default=dict, blank=True)
+    # Solver parameters, see schedule.profiles
+    profile = models.CharField(max_length=20, default="balanced")
+    status = models.CharField(
+        max_length=10, choices=JobStatus.choices, default=JobStatus.QUEUED
+    )
+    stage = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    # Latest solver statistics, see or_tools_scheduler.SolutionProgress
+    objective = models.FloatField(null=True, blank=True)
+    best_bound = models.FloatField(null=True, blank=True)
+    gap = models.FloatField(null=True, blank=True)
+    elapsed = models.FloatField(null=True, blank=True)
+    solution_count = models.PositiveIntegerField(default=0)
+    # Portfolio member the latest statistics come from, see schedule.portfolio
+    member = models.CharField(max_length=50, blank=True)
+    # Step timings and model statistics, see schedule.metrics.RunRecord
+    metrics = models.JSONField(null=True, blank=True)
+    stop_requested = models.BooleanField(default=False)
+    # host:pid of the process running the job, see schedule.jobs
+    worker = models.CharField(max_length=100, blank=True)
+    # Last sign of life of that process, see schedule.jobs.heartbeat
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"#{self.pk} {self.get_status_display()}"
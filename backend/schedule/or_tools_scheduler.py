@@ -1,9 +1,29 @@
 import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import django
+from ortools.graph.python import max_flow
 from ortools.sat.python import cp_model
-from django.db import transaction
+from django.db import connections
 
-from schedule.models import SchoolClass, SubjectHours, Room, Lesson, Subject, Shift
-from users.models import Teacher
+from schedule.cache import (
+    cached_assignments,
+    class_digests,
+    near_hints,
+    problem_fingerprint,
+    store_result,
+)
+from schedule.engines import get_engine, register_engine
+from schedule.metrics import BlockTimer, RunRecord, current_record, recording
+from schedule.models import Lesson, Shift
+from schedule.persistence import apply_changes
+from schedule.profiles import make_solver, solver_parameters
+from schedule.rooms import assign_rooms, room_limits, room_options
+from schedule.snapshot import ProblemSnapshot
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -13,219 +33,1259 @@ WEEKDAYS = list(range(1, 7))  # Mon(1)–Sat(6)
 FIRST_SHIFT_SLOTS = list(range(1, 8))  # Lessons 1–7
 SECOND_SHIFT_SLOTS = list(range(8, 14))  # Lessons 8–13
 
+TOTAL_SLOTS = {
+    Shift.FIRST: len(WEEKDAYS) * len(FIRST_SHIFT_SLOTS),
+    Shift.SECOND: len(WEEKDAYS) * len(SECOND_SHIFT_SLOTS),
+}
+
+# Time limit of re-solving the slots where rooms ran out, see place_rooms
+ROOM_RESOLVE_SECONDS = 20
+# Unplaced lessons listed in the error of place_rooms
+MAX_UNPLACED_LISTED = 10
+
 
-def generate_schedule():
+class VariableRegistry:
     """
-    Generate balanced weekly schedule using CP-SAT solver.
-    Raises Exception if validation fails or no solution found.
+    Decision variables of the CP-SAT model, indexed the way the constraint
+    blocks look them up.
+
+    Every y-variable is registered under (class, day, slot), (teacher, day,
+    slot), (class, subject) and (class, day), so a constraint is built from
+    its own bucket instead of a scan over all of ``y``.
     """
-    logger.info("Starting balanced schedule generation...")
 
-    # 1) Clear existing lessons
-    deleted, _ = Lesson.objects.all().delete()
-    logger.info(f"Cleared {deleted} previous lessons.")
+    def __init__(self, diagnose=False):
+        self.y = {}
+        self.z = {}
+        # Assumption literal per constraint group, see find_infeasibility_core
+        self.guards = {} if diagnose else None
+        self.by_class_slot = defaultdict(list)
+        self.by_teacher_slot = defaultdict(list)
+        self.by_class_subject = defaultdict(list)
+        self.by_class_day = defaultdict(list)
+        self.by_class_subject_day = defaultdict(list)
+        self.by_teacher = defaultdict(list)
+        self.teachers_for = defaultdict(list)
 
-    # 2) Load data
-    classes = list(SchoolClass.objects.all())
-    hours_map = {
-        (sh.school_class_id, sh.subject_id): sh.hours_per_week
-        for sh in SubjectHours.objects.all()
-    }
-    teachers = list(Teacher.objects.prefetch_related("subjects").all())
-    rooms = list(Room.objects.all())
+    def add_z(self, c_id, s_id, t_id, var):
+        self.z[(c_id, s_id, t_id)] = var
+        self.teachers_for[(c_id, s_id)].append(var)
 
-    # 3) Determine slots per class based on shift
-    class_slots = {
-        cls.id: FIRST_SHIFT_SLOTS if cls.shift == Shift.FIRST else SECOND_SHIFT_SLOTS
-        for cls in classes
-    }
-    total_slots = {
-        Shift.FIRST: len(WEEKDAYS) * len(FIRST_SHIFT_SLOTS),
-        Shift.SECOND: len(WEEKDAYS) * len(SECOND_SHIFT_SLOTS),
-    }
+    def add_y(self, c_id, s_id, t_id, d, l, var):
+        self.y[(c_id, s_id, t_id, d, l)] = var
+        self.by_class_slot[(c_id, d, l)].append(var)
+        self.by_teacher_slot[(t_id, d, l)].append(var)
+        self.by_class_subject[(c_id, s_id)].append(var)
+        self.by_class_day[(c_id, d)].append(var)
+        self.by_class_subject_day[(c_id, s_id, d)].append(var)
+        self.by_teacher[t_id].append(var)
 
-    # 4) Data validation
-    errors = False
-    # 4.1) Class-subject hours fit into available slots per shift
-    for (c_id, s_id), hrs in hours_map.items():
-        cls_obj = next(c for c in classes if c.id == c_id)
-        available = total_slots[cls_obj.shift]
-        if hrs > available:
-            subj = Subject.objects.get(id=s_id)
-            logger.error(
-                f"{subj.name} for {cls_obj} requires {hrs}h, only {available} slots available"
-            )
-            errors = True
+    def guard(self, model, *key):
+        """Enforcement literals for the constraint group ``key``, if any."""
+        if self.guards is None:
+            return []
+        if key not in self.guards:
+            self.guards[key] = model.NewBoolVar("guard_" + "_".join(map(str, key)))
+        return [self.guards[key]]
 
-    # 4.2) Subject-level teacher capacity
-    from collections import defaultdict
 
-    subj_hours = defaultdict(int)
+def slots_for_shift(shift):
+    return FIRST_SHIFT_SLOTS if shift == Shift.FIRST else SECOND_SHIFT_SLOTS
+
+
+def teacher_slots(availability, slots):
+    """(day, slot) pairs out of ``slots`` in which a teacher can be placed."""
+    return [
+        (d, l)
+        for d in WEEKDAYS
+        for l in slots
+        if availability is None or (d, l) in availability
+    ]
+
+
+def candidate_teachers(class_shifts, hours_map, teacher_subjects, teacher_availability):
+    """
+    Teachers who can take each (class, subject): qualified for the subject
+    and working at least as many days in the class's shift as the subject
+    has weekly hours, since a subject is taught at most once per day.
+    """
+    subject_teachers = defaultdict(list)
+    for t_id, subject_ids in teacher_subjects.items():
+        for s_id in subject_ids:
+            subject_teachers[s_id].append(t_id)
+
+    candidates = {}
     for (c_id, s_id), hrs in hours_map.items():
-        subj_hours[s_id] += hrs
-    for s_id, need in subj_hours.items():
-        qualified = [t for t in teachers if s_id in {s.id for s in t.subjects.all()}]
-        if not qualified:
-            subj = Subject.objects.get(id=s_id)
-            logger.error(f"No teachers for subject {subj.name}")
-            errors = True
-            continue
-        capacity = sum(
-            t.work_time.get("max_hours_per_week", total_slots[Shift.SECOND])
-            for t in qualified
-        )
-        if need > capacity:
-            subj = Subject.objects.get(id=s_id)
-            logger.error(
-                f"{subj.name} needs {need}h, total capacity {capacity}h from {len(qualified)} teachers"
-            )
-            errors = True
+        slots = slots_for_shift(class_shifts[c_id])
+        candidates[(c_id, s_id)] = [
+            t_id
+            for t_id in subject_teachers[s_id]
+            if len({d for d, l in teacher_slots(teacher_availability.get(t_id), slots)})
+            >= hrs
+        ]
+    return candidates
 
-    if errors:
-        raise Exception("Data validation failed. Fix errors and rerun.")
 
-    # 5) Build CP-SAT model
+def build_model(problem, fixed_teachers=None, diagnose=False, symmetry_breaking=False):
+    """
+    Build the CP-SAT model from the plain data of ``load_problem``.
+
+    ``class_shifts`` maps class id to shift, ``hours_map`` maps
+    (class id, subject id) to weekly hours, ``teacher_subjects`` maps teacher
+    id to the set of subject ids they teach and ``teacher_max_hours`` maps
+    teacher id to the weekly load limit. ``teacher_availability`` maps
+    teacher id to the set of (day, slot) pairs they can work, or None if
+    unrestricted; no variable is created outside of it. The optional
+    ``hints`` is a collection of (c_id, s_id, t_id, d, l) lesson keys from a
+    previous schedule used to warm-start the solver. ``fixed_teachers``
+    maps (class id, subject id) to an already chosen teacher id, leaving
+    only placement to the solver. With ``diagnose`` every constraint group
+    is guarded by an assumption literal in ``registry.guards`` and the
+    model has no objective. ``symmetry_breaking`` orders interchangeable
+    teachers and classes, see ``add_symmetry_breaking``. The optional
+    ``room_limits`` bound the lessons per slot that compete for the same
+    rooms, see ``schedule.rooms.room_limits``.
+    Returns ``(model, registry)``.
+    """
+    class_shifts = problem["class_shifts"]
+    hours_map = problem["hours_map"]
+    teacher_subjects = problem["teacher_subjects"]
+    teacher_max_hours = problem["teacher_max_hours"]
+    teacher_availability = problem.get("teacher_availability")
+    hints = problem.get("hints")
+
     model = cp_model.CpModel()
-    y = {}
-    z = {}
-    teacher_subjects = {t.id: {s.id for s in t.subjects.all()} for t in teachers}
-    for cls in classes:
-        slots = class_slots[cls.id]
-        for (c_id, s_id), hrs in hours_map.items():
-            if c_id != cls.id:
-                continue
-            for t in teachers:
-                if s_id not in teacher_subjects[t.id]:
-                    continue
-                # z enforces one teacher per class-subject
-                z[(c_id, s_id, t.id)] = model.NewBoolVar(f"z_c{c_id}_s{s_id}_t{t.id}")
-                for d in WEEKDAYS:
-                    for l in slots:
-                        y[(c_id, s_id, t.id, d, l)] = model.NewBoolVar(
-                            f"y_c{c_id}_s{s_id}_t{t.id}_d{d}_l{l}"
-                        )
-                        model.Add(y[(c_id, s_id, t.id, d, l)] <= z[(c_id, s_id, t.id)])
+    reg = VariableRegistry(diagnose)
+    blocks = BlockTimer(model, "build_model")
+    class_slots = {c_id: slots_for_shift(shift) for c_id, shift in class_shifts.items()}
+    teacher_availability = teacher_availability or {}
+    if fixed_teachers is None:
+        candidates = candidate_teachers(
+            class_shifts, hours_map, teacher_subjects, teacher_availability
+        )
+    else:
+        candidates = {key: [t_id] for key, t_id in fixed_teachers.items()}
 
-    # 5.2) One teacher per class-subject
+    # 5.1) Variables y[(c,s,t,d,l)] and z[(c,s,t)]
     for (c_id, s_id), hrs in hours_map.items():
-        teacher_vars = [
-            z[(c_id, s_id, t.id)] for t in teachers if (c_id, s_id, t.id) in z
-        ]
-        model.Add(sum(teacher_vars) == 1)
+        for t_id in candidates[(c_id, s_id)]:
+            # z enforces one teacher per class-subject
+            z_var = model.NewBoolVar(f"z_c{c_id}_s{s_id}_t{t_id}")
+            reg.add_z(c_id, s_id, t_id, z_var)
+            for d, l in teacher_slots(teacher_availability.get(t_id), class_slots[c_id]):
+                y_var = model.NewBoolVar(f"y_c{c_id}_s{s_id}_t{t_id}_d{d}_l{l}")
+                reg.add_y(c_id, s_id, t_id, d, l, y_var)
+                model.Add(y_var <= z_var)
+    blocks.lap("variables")
+
+    # 5.2) One teacher per class-subject
+    for key in hours_map:
+        model.Add(sum(reg.teachers_for[key]) == 1).OnlyEnforceIf(
+            reg.guard(model, "teacher_choice", *key)
+        )
+    blocks.lap("teacher_choice")
 
     # 5.3) Hours per plan
-    for (c_id, s_id), hrs in hours_map.items():
-        lesson_vars = [
-            var
-            for var_key, var in y.items()
-            if var_key[0] == c_id and var_key[1] == s_id
-        ]
-        model.Add(sum(lesson_vars) == hrs)
+    for key, hrs in hours_map.items():
+        model.Add(sum(reg.by_class_subject[key]) == hrs).OnlyEnforceIf(
+            reg.guard(model, "hours", *key)
+        )
+    blocks.lap("hours")
 
     # 5.4) FGOS: at most one lesson of same subject per day
     for (c_id, s_id), hrs in hours_map.items():
-        slots = class_slots[c_id]
         for d in WEEKDAYS:
-            daily_vars = [
-                y[(c_id, s_id, t.id, d, l)]
-                for t in teachers
-                for l in slots
-                if (c_id, s_id, t.id, d, l) in y
-            ]
-            model.Add(sum(daily_vars) <= 1)
+            daily_vars = reg.by_class_subject_day[(c_id, s_id, d)]
+            enforce = reg.guard(model, "daily", c_id, s_id)
+            model.Add(sum(daily_vars) <= 1).OnlyEnforceIf(enforce)
             if hrs == len(WEEKDAYS):
-                model.Add(sum(daily_vars) == 1)
+                model.Add(sum(daily_vars) == 1).OnlyEnforceIf(enforce)
+    blocks.lap("daily")
 
     # 5.5) One lesson per class per slot
-    for cls in classes:
-        slots = class_slots[cls.id]
+    for c_id, slots in class_slots.items():
         for d in WEEKDAYS:
             for l in slots:
-                slot_vars = [
-                    y[key]
-                    for key in y
-                    if key[0] == cls.id and key[3] == d and key[4] == l
-                ]
-                model.Add(sum(slot_vars) <= 1)
-
-    # 5.6) Teacher constraints
-    for t in teachers:
-        max_h = t.work_time.get("max_hours_per_week", total_slots[Shift.SECOND])
-        for shift_val in [Shift.FIRST, Shift.SECOND]:
-            slots = (
-                FIRST_SHIFT_SLOTS if shift_val == Shift.FIRST else SECOND_SHIFT_SLOTS
-            )
-            cls_ids = [c.id for c in classes if c.shift == shift_val]
-            for d in WEEKDAYS:
-                for l in slots:
-                    t_vars = [
-                        y[(c, s, t.id, d, l)]
-                        for (c, s, t_id, dd, ll) in y
-                        if t_id == t.id and c in cls_ids and dd == d and ll == l
-                    ]
-                    model.Add(sum(t_vars) <= 1)
-        # Weekly load
-        week_vars = [var for key, var in y.items() if key[2] == t.id]
-        model.Add(sum(week_vars) <= max_h)
+                slot_vars = reg.by_class_slot[(c_id, d, l)]
+                if len(slot_vars) > 1:
+                    model.Add(sum(slot_vars) <= 1).OnlyEnforceIf(
+                        reg.guard(model, "class_slot", c_id)
+                    )
+    blocks.lap("class_slot")
+
+    # 5.6) Teacher constraints. Shifts use disjoint slot numbers, so a
+    # (teacher, day, slot) bucket only ever holds classes of one shift.
+    for (t_id, d, l), t_vars in reg.by_teacher_slot.items():
+        if len(t_vars) > 1:
+            model.Add(sum(t_vars) <= 1).OnlyEnforceIf(reg.guard(model, "teacher_slot", t_id))
+    blocks.lap("teacher_slot")
+    # Weekly load
+    for t_id, week_vars in reg.by_teacher.items():
+        model.Add(sum(week_vars) <= teacher_max_hours[t_id]).OnlyEnforceIf(
+            reg.guard(model, "teacher_load", t_id)
+        )
+    blocks.lap("teacher_load")
+
+    # 5.6b) Lessons that fit only a set of rooms never outnumber its free rooms
+    if problem.get("room_limits"):
+        lesson_slots = defaultdict(lambda: defaultdict(list))
+        for (c_id, s_id, t_id, d, l), var in reg.y.items():
+            lesson_slots[(c_id, s_id)][(d, l)].append(var)
+        for idx, (keys, size, free) in enumerate(problem["room_limits"]):
+            slot_vars = defaultdict(list)
+            for key in keys:
+                for slot, y_vars in lesson_slots[key].items():
+                    slot_vars[slot].extend(y_vars)
+            for slot, y_vars in slot_vars.items():
+                capacity = free.get(slot, size)
+                if len(y_vars) > capacity:
+                    model.Add(sum(y_vars) <= capacity).OnlyEnforceIf(
+                        reg.guard(model, "rooms", idx)
+                    )
+        blocks.lap("rooms")
 
     # 5.7) No gaps per class/day
-    for cls in classes:
-        slots = class_slots[cls.id]
+    for c_id, slots in class_slots.items():
         for d in WEEKDAYS:
             for idx in range(1, len(slots)):
                 curr, prev = slots[idx], slots[idx - 1]
-                curr_vars = [
-                    y[(cls.id, s, t, d, curr)]
-                    for (c, s, t, dd, ll) in y
-                    if c == cls.id and dd == d and ll == curr
-                ]
-                prev_vars = [
-                    y[(cls.id, s, t, d, prev)]
-                    for (c, s, t, dd, ll) in y
-                    if c == cls.id and dd == d and ll == prev
-                ]
-                model.Add(sum(curr_vars) <= sum(prev_vars))
+                curr_vars = reg.by_class_slot[(c_id, d, curr)]
+                prev_vars = reg.by_class_slot[(c_id, d, prev)]
+                model.Add(sum(curr_vars) <= sum(prev_vars)).OnlyEnforceIf(
+                    reg.guard(model, "no_gaps", c_id)
+                )
+    blocks.lap("no_gaps")
+
+    if diagnose:
+        return model, reg
 
     # 5.8) Balance lessons across the week (minimize imbalance)
     Lmax = {}
     Lmin = {}
-    for cls in classes:
-        slots = class_slots[cls.id]
-        Lmax[cls.id] = model.NewIntVar(0, len(slots), f"Lmax_c{cls.id}")
-        Lmin[cls.id] = model.NewIntVar(0, len(slots), f"Lmin_c{cls.id}")
+    for c_id, slots in class_slots.items():
+        Lmax[c_id] = model.NewIntVar(0, len(slots), f"Lmax_c{c_id}")
+        Lmin[c_id] = model.NewIntVar(0, len(slots), f"Lmin_c{c_id}")
         for d in WEEKDAYS:
-            day_vars = [
-                y[(cls.id, s, t, d, l)]
-                for (c, s, t, dd, l) in y
-                if c == cls.id and dd == d
-            ]
-            model.Add(sum(day_vars) <= Lmax[cls.id])
-            model.Add(sum(day_vars) >= Lmin[cls.id])
-    model.Minimize(sum(Lmax[c.id] - Lmin[c.id] for c in classes))
-
-    # 6) Solve
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 180
-    solver.parameters.log_search_progress = True
-    solver.parameters.num_search_workers = 8
+            day_vars = reg.by_class_day[(c_id, d)]
+            model.Add(sum(day_vars) <= Lmax[c_id])
+            model.Add(sum(day_vars) >= Lmin[c_id])
+    model.Minimize(sum(Lmax[c_id] - Lmin[c_id] for c_id in class_slots))
+    blocks.lap("balance")
+
+    # 5.9) Symmetry breaking, with a warm start relabelled into its order
+    if symmetry_breaking and fixed_teachers is None:
+        add_symmetry_breaking(model, reg, problem, candidates)
+        if hints:
+            hints = order_hints(problem, candidates, hints)
+    if hints:
+        add_hints(model, reg, hints)
+    blocks.lap("warm_start")
+
+    return model, reg
+
+
+def symmetry_groups(problem):
+    """
+    Interchangeable teachers and classes of ``problem``, as lists of ids of
+    two or more. Teachers are interchangeable when they teach the same
+    subjects with the same availability and weekly limit; classes when
+    they share a shift and the same hours per subject, as parallel classes
+    on one study plan do.
+    """
+    teacher_availability = problem.get("teacher_availability") or {}
+    teachers = defaultdict(list)
+    for t_id in sorted(problem["teacher_subjects"]):
+        availability = teacher_availability.get(t_id)
+        key = (
+            frozenset(problem["teacher_subjects"][t_id]),
+            None if availability is None else frozenset(availability),
+            problem["teacher_max_hours"][t_id],
+        )
+        teachers[key].append(t_id)
+
+    class_hours = defaultdict(dict)
+    for (c_id, s_id), hrs in problem["hours_map"].items():
+        class_hours[c_id][s_id] = hrs
+    classes = defaultdict(list)
+    for c_id in sorted(class_hours):
+        key = (problem["class_shifts"][c_id], frozenset(class_hours[c_id].items()))
+        classes[key].append(c_id)
+
+    return (
+        [group for group in teachers.values() if len(group) > 1],
+        [group for group in classes.values() if len(group) > 1],
+    )
+
+
+def add_symmetry_breaking(model, reg, problem, candidates):
+    """
+    Order interchangeable teachers by the first class-subject they take and
+    interchangeable classes by the teacher group of their main subject.
+    Relabelling such teachers or swapping the whole timetables of such
+    classes keeps a solution valid with the same objective, so some
+    relabelling always satisfies both orders: classes are sorted first,
+    and sorting teachers afterwards does not change their groups.
+    """
+    teacher_groups, class_groups = symmetry_groups(problem)
+
+    for group in teacher_groups:
+        # Value precedence: the teacher after t_id in the group may take a
+        # class-subject only if t_id took an earlier one
+        class_subjects = [key for key in sorted(candidates) if group[0] in candidates[key]]
+        for t_id, next_id in zip(group, group[1:]):
+            for i, key in enumerate(class_subjects):
+                earlier = [reg.z[(*prev_key, t_id)] for prev_key in class_subjects[:i]]
+                model.Add(reg.z[(*key, next_id)] <= sum(earlier))
+
+    # Classes are ordered by the teacher group of their main subject, which
+    # relabelling teachers inside a group leaves unchanged
+    rank = {}
+    for group in teacher_groups:
+        for t_id in group:
+            rank[t_id] = group[0]
+    for group in class_groups:
+        s_id = main_subject(problem, group[0])
+
+        def teacher_group(cls_id):
+            return sum(
+                rank.get(t_id, t_id) * reg.z[(cls_id, s_id, t_id)]
+                for t_id in candidates[(cls_id, s_id)]
+            )
+
+        for cls_id, next_id in zip(group, group[1:]):
+            model.Add(teacher_group(cls_id) <= teacher_group(next_id))
+
+
+def main_subject(problem, c_id):
+    """Subject with the most weekly hours of class ``c_id``, lowest id first."""
+    return max(
+        (s_id for (cc_id, s_id) in problem["hours_map"] if cc_id == c_id),
+        key=lambda s_id: (problem["hours_map"][(c_id, s_id)], -s_id),
+    )
+
+
+def order_hints(problem, candidates, lessons):
+    """
+    The (c_id, s_id, t_id, d, l) ``lessons`` with interchangeable classes
+    and teachers relabelled into the order of ``add_symmetry_breaking``:
+    the same timetable under other names, so it stays a usable hint.
+    Classes are reordered first, as the proof there does.
+    """
+    teacher_groups, class_groups = symmetry_groups(problem)
+    rank = {t_id: group[0] for group in teacher_groups for t_id in group}
+
+    teacher_of = {(c_id, s_id): t_id for c_id, s_id, t_id, d, l in lessons}
+    class_map = {}
+    for group in class_groups:
+        s_id = main_subject(problem, group[0])
+
+        def group_rank(c_id):
+            t_id = teacher_of.get((c_id, s_id))
+            # Classes without a hinted teacher go last
+            return (t_id is None, rank.get(t_id, t_id) if t_id is not None else 0)
+
+        for c_id, source in zip(group, sorted(group, key=group_rank)):
+            class_map[source] = c_id
+    lessons = [(class_map.get(c_id, c_id), s_id, t_id, d, l) for c_id, s_id, t_id, d, l in lessons]
+
+    teacher_of = {(c_id, s_id): t_id for c_id, s_id, t_id, d, l in lessons}
+    teacher_map = {}
+    for group in teacher_groups:
+        class_subjects = [key for key in sorted(candidates) if group[0] in candidates[key]]
+        first = {}
+        for i, key in enumerate(class_subjects):
+            first.setdefault(teacher_of.get(key), i)
+        ordered = sorted(group, key=lambda t_id: first.get(t_id, len(class_subjects)))
+        for t_id, source in zip(group, ordered):
+            teacher_map[source] = t_id
+    return [(c_id, s_id, teacher_map.get(t_id, t_id), d, l) for c_id, s_id, t_id, d, l in lessons]
+
+
+def add_hints(model, reg, lessons):
+    """
+    Hint the solver towards a previous schedule given as (c_id, s_id, t_id,
+    d, l) keys. Only class-subjects that the previous schedule covered are
+    hinted, so new study plan entries are left for the solver to place.
+    """
+    lessons = set(lessons)
+    taught = {(c_id, s_id, t_id) for c_id, s_id, t_id, d, l in lessons}
+    covered = {(c_id, s_id) for c_id, s_id, t_id in taught}
+    for key, var in reg.z.items():
+        if key[:2] in covered:
+            model.AddHint(var, key in taught)
+    for key, var in reg.y.items():
+        if key[:2] in covered:
+            model.AddHint(var, key in lessons)
+
+
+def assign_teachers(problem):
+    """
+    Phase one of the two-phase solve: pick one teacher per (class, subject)
+    so that the most loaded teacher uses as small a share of their
+    ``max_hours_per_week`` as possible, hinting the teachers of the previous
+    schedule. Returns ``{(c_id, s_id): t_id}`` or None if no assignment fits
+    the teachers' limits.
+    """
+    class_shifts = problem["class_shifts"]
+    hours_map = problem["hours_map"]
+    teacher_max_hours = problem["teacher_max_hours"]
+    teacher_availability = problem["teacher_availability"]
+    hints = problem.get("hints")
+
+    model = cp_model.CpModel()
+    candidates = candidate_teachers(
+        class_shifts, hours_map, problem["teacher_subjects"], teacher_availability
+    )
+    x = {}
+    for (c_id, s_id), t_ids in candidates.items():
+        for t_id in t_ids:
+            x[(c_id, s_id, t_id)] = model.NewBoolVar(f"x_c{c_id}_s{s_id}_t{t_id}")
+        model.Add(sum(x[(c_id, s_id, t_id)] for t_id in t_ids) == 1)
+
+    # Load per teacher and shift, capped by the weekly limit and by the
+    # slots the teacher works in that shift
+    load = defaultdict(list)
+    shift_load = defaultdict(list)
+    for (c_id, s_id, t_id), var in x.items():
+        hrs = hours_map[(c_id, s_id)]
+        load[t_id].append(hrs * var)
+        shift_load[(t_id, class_shifts[c_id])].append(hrs * var)
+    for (t_id, shift), terms in shift_load.items():
+        open_slots = teacher_slots(teacher_availability.get(t_id), slots_for_shift(shift))
+        model.Add(sum(terms) <= len(open_slots))
+
+    # Balance: load_t / max_hours_t <= ratio / 100 for every teacher
+    ratio = model.NewIntVar(0, 100, "max_load_percent")
+    for t_id, terms in load.items():
+        max_h = teacher_max_hours[t_id]
+        model.Add(sum(terms) <= max_h)
+        model.Add(100 * sum(terms) <= ratio * max_h)
+    model.Minimize(ratio)
+
+    if hints:
+        taught = {(c_id, s_id, t_id) for c_id, s_id, t_id, d, l in hints}
+        covered = {(c_id, s_id) for c_id, s_id, t_id in taught}
+        for key, var in x.items():
+            if key[:2] in covered:
+                model.AddHint(var, key in taught)
+
+    solver = make_solver(problem.get("solver"), max_time_in_seconds=30)
     status = solver.Solve(model)
+    logger.info(f"Teacher assignment status: {solver.StatusName(status)}")
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    return {(c_id, s_id): t_id for (c_id, s_id, t_id), var in x.items() if solver.Value(var)}
+
+
+class SolutionProgress(cp_model.CpSolverSolutionCallback):
+    """
+    Passes objective value, best bound, relative gap, elapsed time and
+    solution count to ``on_solution`` as new solutions are found. The search
+    stops early when ``on_solution`` returns a true value. CP-SAT runs the
+    callback on its own threads; while ``polling``, a timer thread also
+    reports the latest solution when none came for ``report_interval``, so
+    that a stop request is seen while the solver is proving the bound.
+    """
+
+    # Seconds between two reports; the final statistics are always reported
+    report_interval = 1.0
+
+    def __init__(self, on_solution):
+        super().__init__()
+        self.on_solution = on_solution
+        self.solution_count = 0
+        self.last_report = None
+        self.latest = None
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def stats(self, objective, bound, elapsed):
+        return {
+            "objective": objective,
+            "best_bound": bound,
+            "gap": abs(objective - bound) / max(1.0, abs(objective)),
+            "elapsed": elapsed,
+            "solution_count": self.solution_count,
+        }
+
+    def on_solution_callback(self):
+        with self.lock:
+            self.solution_count += 1
+            self.latest = (self.ObjectiveValue(), self.BestObjectiveBound())
+            self.report(due_only=True)
+
+    def report(self, due_only=False):
+        """Report the latest solution; call with ``lock`` held."""
+        elapsed = time.monotonic() - self.started
+        if due_only and self.last_report is not None:
+            if elapsed - self.last_report < self.report_interval:
+                return
+        self.last_report = elapsed
+        if self.on_solution(self.stats(*self.latest, elapsed)):
+            logger.info("Search stopped on request.")
+            self.StopSearch()
+
+    @contextmanager
+    def polling(self):
+        """Report from a timer thread as well while the block runs."""
+        done = threading.Event()
+
+        def poll():
+            while not done.wait(self.report_interval):
+                with self.lock:
+                    if self.latest is not None:
+                        self.report(due_only=True)
+
+        thread = threading.Thread(target=poll, daemon=True)
+        self.started = time.monotonic()
+        thread.start()
+        try:
+            yield self
+        finally:
+            done.set()
+            thread.join()
+
+
+def run_solver(model, on_solution=None, parameters=None):
+    """
+    Solve ``model`` with the solver ``parameters`` of ``schedule.profiles``
+    (the default profile if None), reporting progress to ``on_solution`` as
+    described in ``SolutionProgress``. Returns ``(solver, status)``.
+    """
+    solver = make_solver(parameters, log_search_progress=True)
+    if on_solution is None:
+        status = solver.Solve(model)
+    else:
+        callback = SolutionProgress(on_solution)
+        with callback.polling():
+            status = solver.Solve(model, callback)
+        if callback.solution_count:
+            on_solution(
+                callback.stats(
+                    solver.ObjectiveValue(), solver.BestObjectiveBound(), solver.WallTime()
+                )
+            )
 
     logger.info(f"CP-SAT status: {solver.StatusName(status)}")
+    record = current_record()
+    if record is not None:
+        record.add_model(model, solver, status)
+    return solver, status
+
+
+def solve_model(model, reg, on_solution=None, parameters=None):
+    """
+    Solve a model built by ``build_model``. Returns the chosen
+    (c_id, s_id, t_id, d, l) keys, or None if no solution was found.
+    """
+    solver, status = run_solver(model, on_solution, parameters)
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        raise Exception("No solution found.")
-
-    # 7) Save schedule
-    with transaction.atomic():
-        for key, var in y.items():
-            if solver.Value(var):
-                c_id, s_id, t_id, d, l = key
-                room = rooms[0] if rooms else None
-                Lesson.objects.create(
-                    school_class_id=c_id,
-                    subject_id=s_id,
-                    teacher_id=t_id,
-                    weekday=d,
-                    lesson_number=l,
-                    room=room,
+        return None
+    return [key for key, var in reg.y.items() if solver.Value(var)]
+
+
+def find_infeasibility_core(problem, time_limit=60, probe_time_limit=10):
+    """
+    Explain why the joint model of ``problem`` has no solution. Every
+    constraint group is guarded by an assumption literal; when CP-SAT
+    proves the model infeasible, the groups it needed are shrunk by
+    dropping one at a time while the rest stays infeasible.
+
+    Returns a list of group keys such as ("teacher_load", t_id) or
+    ("hours", c_id, s_id), see ``describe_core``, or None if the model was
+    not proven infeasible within ``time_limit`` seconds.
+    """
+    model, reg = build_model(problem, diagnose=True)
+    by_index = {var.Index(): key for key, var in reg.guards.items()}
+
+    def infeasible_core(keys, limit):
+        model.ClearAssumptions()
+        model.AddAssumptions([reg.guards[key] for key in keys])
+        # Cores are only reported by the single-worker search
+        solver = make_solver(
+            problem.get("solver"), max_time_in_seconds=limit, num_search_workers=1
+        )
+        if solver.Solve(model) != cp_model.INFEASIBLE:
+            return None
+        return [by_index[index] for index in solver.SufficientAssumptionsForInfeasibility()]
+
+    core = infeasible_core(list(reg.guards), time_limit)
+    if core is None:
+        return None
+    logger.info(f"Infeasible core of {len(core)} constraint groups, shrinking...")
+    for key in list(core):
+        if key not in core:
+            continue
+        smaller = infeasible_core([k for k in core if k != key], probe_time_limit)
+        if smaller is not None:
+            core = smaller
+    return core
+
+
+def shift_subproblem(problem, shift, budgets):
+    """
+    Part of ``problem`` covering the classes of one shift, with the
+    teachers' weekly limits replaced by ``budgets``.
+    """
+    class_shifts = {
+        c_id: sh for c_id, sh in problem["class_shifts"].items() if sh == shift
+    }
+    return {
+        **problem,
+        "class_shifts": class_shifts,
+        "hours_map": {
+            key: hrs for key, hrs in problem["hours_map"].items() if key[0] in class_shifts
+        },
+        "teacher_max_hours": budgets,
+    }
+
+
+def neighbourhood_subproblem(problem, class_ids, frozen):
+    """
+    Part of ``problem`` covering only ``class_ids``. The ``frozen`` lessons
+    of all other classes stay in place, so the slots they occupy are taken
+    out of their teachers' availability and weekly limits.
+    """
+    busy = defaultdict(set)
+    for c_id, s_id, t_id, d, l in frozen:
+        busy[t_id].add((d, l))
+    all_slots = {(d, l) for d in WEEKDAYS for l in FIRST_SHIFT_SLOTS + SECOND_SHIFT_SLOTS}
+
+    availability = {}
+    for t_id, slots in problem["teacher_availability"].items():
+        if busy[t_id]:
+            slots = (all_slots if slots is None else slots) - busy[t_id]
+        availability[t_id] = slots
+    return {
+        **problem,
+        "class_shifts": {
+            c_id: sh for c_id, sh in problem["class_shifts"].items() if c_id in class_ids
+        },
+        "hours_map": {
+            key: hrs for key, hrs in problem["hours_map"].items() if key[0] in class_ids
+        },
+        "teacher_max_hours": {
+            t_id: max(0, max_h - len(busy[t_id]))
+            for t_id, max_h in problem["teacher_max_hours"].items()
+        },
+        "teacher_availability": availability,
+    }
+
+
+def split_budgets(problem, shifts):
+    """
+    Split every teacher's ``max_hours_per_week`` between shifts in
+    proportion to the hours they could be asked to teach in each.
+    """
+    candidates = candidate_teachers(
+        problem["class_shifts"],
+        problem["hours_map"],
+        problem["teacher_subjects"],
+        problem["teacher_availability"],
+    )
+    demand = Counter()
+    for (c_id, s_id), t_ids in candidates.items():
+        for t_id in t_ids:
+            demand[(t_id, problem["class_shifts"][c_id])] += problem["hours_map"][(c_id, s_id)]
+
+    budgets = {shift: {} for shift in shifts}
+    for t_id, max_h in problem["teacher_max_hours"].items():
+        total = sum(demand[(t_id, shift)] for shift in shifts)
+        remaining = max_h
+        for shift in shifts[:-1]:
+            share = max_h * demand[(t_id, shift)] // total if total else 0
+            budgets[shift][t_id] = share
+            remaining -= share
+        budgets[shifts[-1]][t_id] = remaining
+    return budgets
+
+
+# Connections a forked worker inherited from its parent. They stay
+# referenced so that they are never closed: closing one would end the
+# parent's database session on the shared socket.
+_inherited_connections = []
+
+
+def init_worker():
+    """
+    Process pool initializer for workers that may touch the database.
+    The parent should call ``connections.close_all()`` before forking.
+    """
+    django.setup()
+    for conn in connections.all(initialized_only=True):
+        if conn.connection is not None:
+            _inherited_connections.append(conn.connection)
+            conn.connection = None
+
+
+def solve_subproblem(problem, on_solution=None):
+    model, reg = build_model(problem)
+    return solve_model(model, reg, on_solution, problem.get("solver"))
+
+
+def teacher_usage(assignments):
+    return Counter(t_id for c_id, s_id, t_id, d, l in assignments)
+
+
+def solve_by_shift(problem, on_solution=None):
+    """
+    Solve first- and second-shift classes as separate models in parallel
+    processes. Shifts use disjoint slots, so they only interact through
+    each teacher's weekly limit, which is split between them up front.
+
+    If one side is infeasible it is re-solved with whatever the other side
+    left unused; failing that, it is solved with the full limits and the
+    other side is re-solved with the remainder. Returns the combined
+    assignments or None.
+    """
+    shifts = sorted(set(problem["class_shifts"].values()))
+    if not shifts:
+        return []
+    budgets = split_budgets(problem, shifts)
+    # The shifts are solved side by side, so they share the search workers
+    parameters = problem.get("solver") or solver_parameters()
+    shared = dict(
+        parameters,
+        num_search_workers=max(1, parameters["num_search_workers"] // len(shifts)),
+    )
+    # Connections must not be shared with the forked processes
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=len(shifts), initializer=init_worker) as pool:
+        results = dict(
+            zip(
+                shifts,
+                pool.map(
+                    solve_subproblem,
+                    [
+                        {**shift_subproblem(problem, shift, budgets[shift]), "solver": shared}
+                        for shift in shifts
+                    ],
+                    [on_solution] * len(shifts),
+                ),
+            )
+        )
+
+    failed = [shift for shift in shifts if results[shift] is None]
+    if len(failed) == 1 and len(shifts) == 2:
+        shift = failed[0]
+        other = shifts[0] if shifts[1] == shift else shifts[1]
+        max_hours = problem["teacher_max_hours"]
+        logger.info(f"Shift {shift} infeasible within its budget, renegotiating.")
+
+        used = teacher_usage(results[other])
+        leftover = {t_id: max_h - used[t_id] for t_id, max_h in max_hours.items()}
+        results[shift] = solve_subproblem(
+            shift_subproblem(problem, shift, leftover), on_solution
+        )
+        if results[shift] is None:
+            results[shift] = solve_subproblem(
+                shift_subproblem(problem, shift, max_hours), on_solution
+            )
+            if results[shift] is not None:
+                used = teacher_usage(results[shift])
+                leftover = {t_id: max_h - used[t_id] for t_id, max_h in max_hours.items()}
+                results[other] = solve_subproblem(
+                    shift_subproblem(problem, other, leftover), on_solution
+                )
+
+    if any(results[shift] is None for shift in shifts):
+        return None
+    return [key for shift in shifts for key in results[shift]]
+
+
+def load_problem():
+    """
+    Load the scheduling input as the plain data every engine takes, see
+    ``ProblemSnapshot``. Also returns the snapshot for error messages.
+    """
+    snapshot = ProblemSnapshot.load(default_max_hours=TOTAL_SLOTS[Shift.SECOND])
+    return snapshot.problem(), snapshot
+
+
+def capacity_conflicts(problem, candidates):
+    """
+    Hall's condition for the teacher choice, checked as a max-flow: every
+    (class, subject) sends its weekly hours to its candidate teachers,
+    who accept at most their open slots in the class's shift and their
+    ``max_hours_per_week`` in total. Any schedule is such a flow, so if
+    the maximum flow is short of the total demand no schedule exists.
+
+    Returns a list of ``(class_subjects, need, bottlenecks)`` groups from
+    the minimum cut: the class-subjects that need ``need`` hours together
+    and the (t_id, shift or None, capacity) arcs that limit them, where
+    shift is None for the weekly limit.
+    """
+    hours_map = problem["hours_map"]
+    class_shifts = problem["class_shifts"]
+    demand = sum(hours_map.values())
+    flow = max_flow.SimpleMaxFlow()
+    source, sink = 0, 1
+    nodes = {}
+
+    def node(key):
+        if key not in nodes:
+            nodes[key] = len(nodes) + 2
+        return nodes[key]
+
+    teacher_arcs = {}
+    for (c_id, s_id), hrs in hours_map.items():
+        flow.add_arc_with_capacity(source, node(("cs", c_id, s_id)), hrs)
+        shift = class_shifts[c_id]
+        for t_id in candidates[(c_id, s_id)]:
+            flow.add_arc_with_capacity(node(("cs", c_id, s_id)), node(("ts", t_id, shift)), demand)
+            if (t_id, shift) not in teacher_arcs:
+                open_slots = len(
+                    teacher_slots(problem["teacher_availability"].get(t_id), slots_for_shift(shift))
+                )
+                flow.add_arc_with_capacity(node(("ts", t_id, shift)), node(("t", t_id)), open_slots)
+                teacher_arcs[(t_id, shift)] = open_slots
+            if (t_id, None) not in teacher_arcs:
+                max_h = problem["teacher_max_hours"][t_id]
+                flow.add_arc_with_capacity(node(("t", t_id)), sink, max_h)
+                teacher_arcs[(t_id, None)] = max_h
+
+    if flow.solve(source, sink) != flow.OPTIMAL or flow.optimal_flow() >= demand:
+        return []
+
+    # Split the source side of the cut into groups sharing teachers
+    cut = set(flow.get_source_side_min_cut())
+    group_of = {}
+
+    def find(key):
+        while group_of.setdefault(key, key) != key:
+            key = group_of[key]
+        return key
+
+    for (c_id, s_id) in hours_map:
+        if node(("cs", c_id, s_id)) not in cut:
+            continue
+        for t_id in candidates[(c_id, s_id)]:
+            group_of[find(("ts", t_id, class_shifts[c_id]))] = find(("cs", c_id, s_id))
+    for (t_id, shift) in teacher_arcs:
+        if shift is not None and nodes[("ts", t_id, shift)] in cut and nodes[("t", t_id)] in cut:
+            group_of[find(("t", t_id))] = find(("ts", t_id, shift))
+
+    groups = defaultdict(lambda: ([], 0, []))
+    for key in list(group_of):
+        kind, *ids = key
+        root = find(key)
+        class_subjects, need, bottlenecks = groups[root]
+        if kind == "cs":
+            class_subjects.append(tuple(ids))
+            need += hours_map[tuple(ids)]
+        elif kind == "ts" and nodes[("t", ids[0])] not in cut:
+            bottlenecks.append((ids[0], ids[1], teacher_arcs[tuple(ids)]))
+        elif kind == "t" and nodes[key] in cut:
+            bottlenecks.append((ids[0], None, teacher_arcs[(ids[0], None)]))
+        groups[root] = (class_subjects, need, bottlenecks)
+
+    return [
+        (sorted(class_subjects), need, sorted(bottlenecks, key=str))
+        for class_subjects, need, bottlenecks in groups.values()
+        if need > sum(capacity for t_id, shift, capacity in bottlenecks)
+    ]
+
+
+def validate_problem(problem, snapshot):
+    """Log every data error found and raise Exception if there were any."""
+    hours_map = problem["hours_map"]
+    teacher_subjects = problem["teacher_subjects"]
+    teacher_max_hours = problem["teacher_max_hours"]
+    teacher_availability = problem["teacher_availability"]
+    class_names = snapshot.class_labels()
+    subject_names = snapshot.subject_labels()
+    teacher_names = snapshot.teacher_labels()
+    errors = []
+
+    # 4.1) Class-subject hours fit into available slots per shift
+    class_hours = defaultdict(int)
+    for (c_id, s_id), hrs in hours_map.items():
+        class_hours[c_id] += hrs
+        available = TOTAL_SLOTS[problem["class_shifts"][c_id]]
+        if hrs > available:
+            errors.append(
+                f"{subject_names[s_id]} for {class_names[c_id]} requires {hrs}h, only {available} slots available"
+            )
+    for c_id, hrs in class_hours.items():
+        available = TOTAL_SLOTS[problem["class_shifts"][c_id]]
+        if hrs > available:
+            errors.append(f"{class_names[c_id]} has {hrs}h a week, only {available} slots available")
+
+    # 4.2) Subject-level teacher capacity
+    subj_hours = defaultdict(int)
+    for (c_id, s_id), hrs in hours_map.items():
+        subj_hours[s_id] += hrs
+    for s_id, need in subj_hours.items():
+        qualified = [t_id for t_id, s_ids in teacher_subjects.items() if s_id in s_ids]
+        if not qualified:
+            errors.append(f"No teachers for subject {subject_names[s_id]}")
+            continue
+        capacity = sum(
+            teacher_max_hours[t_id]
+            if teacher_availability[t_id] is None
+            else min(teacher_max_hours[t_id], len(teacher_availability[t_id]))
+            for t_id in qualified
+        )
+        if need > capacity:
+            errors.append(
+                f"{subject_names[s_id]} needs {need}h, total capacity {capacity}h from {len(qualified)} teachers"
+            )
+
+    # 4.3) Some qualified teacher works enough days in the class's shift
+    candidates = candidate_teachers(
+        problem["class_shifts"], hours_map, teacher_subjects, teacher_availability
+    )
+    for (c_id, s_id), t_ids in candidates.items():
+        if not t_ids:
+            errors.append(
+                f"No teacher of {subject_names[s_id]} has {hours_map[(c_id, s_id)]} "
+                f"working days free for {class_names[c_id]}"
+            )
+
+    # 4.4) Every lesson has a room that is suitable and large enough
+    if problem.get("room_capacity"):
+        for (c_id, s_id), rooms in room_options(problem).items():
+            if not rooms:
+                errors.append(
+                    f"No room suitable for {subject_names[s_id]} seats "
+                    f"{class_names[c_id]} ({problem['class_sizes'][c_id]} students)"
                 )
+
+    # 4.5) Teachers shared between class-subjects can cover them all
+    if not errors:
+        for class_subjects, need, bottlenecks in capacity_conflicts(problem, candidates):
+            lessons = ", ".join(
+                f"{subject_names[s_id]} in {class_names[c_id]}" for c_id, s_id in class_subjects
+            )
+            limits = ", ".join(
+                f"{teacher_names[t_id]} {capacity}h "
+                + ("a week" if shift is None else f"of free slots in shift {shift}")
+                for t_id, shift, capacity in bottlenecks
+            )
+            errors.append(
+                f"{lessons} need {need}h together, but their teachers can give only {limits}"
+            )
+
+    for message in errors:
+        logger.error(message)
+    if errors:
+        raise Exception(
+            "Data validation failed. Fix errors and rerun:\n" + "\n".join(errors)
+        )
+
+
+def describe_core(core, problem, snapshot):
+    """Human-readable lines for the groups of ``find_infeasibility_core``."""
+    class_names = snapshot.class_labels()
+    subject_names = snapshot.subject_labels()
+    teacher_names = snapshot.teacher_labels()
+    lines = []
+    for kind, *ids in sorted(core):
+        if kind == "teacher_load":
+            lines.append(
+                f"{teacher_names[ids[0]]}: at most {problem['teacher_max_hours'][ids[0]]}h a week"
+            )
+        elif kind == "teacher_slot":
+            lines.append(f"{teacher_names[ids[0]]}: one lesson at a time")
+        elif kind == "class_slot":
+            lines.append(f"{class_names[ids[0]]}: one lesson at a time")
+        elif kind == "no_gaps":
+            lines.append(f"{class_names[ids[0]]}: no gaps between lessons")
+        elif kind == "rooms":
+            lines.append("Not enough suitable rooms in some slots")
+        else:
+            c_id, s_id = ids
+            lesson = f"{subject_names[s_id]} in {class_names[c_id]}"
+            if kind == "hours":
+                lines.append(f"{lesson}: {problem['hours_map'][(c_id, s_id)]}h a week")
+            elif kind == "daily":
+                lines.append(f"{lesson}: at most one lesson a day")
+            else:
+                lines.append(f"{lesson}: a single teacher")
+    return lines
+
+
+def place_rooms(problem, assignments):
+    """
+    Assign rooms to the solved ``assignments`` by matching the lessons of
+    each slot, see ``schedule.rooms``. If some lessons find no room, the
+    classes competing for those rooms in those slots are re-solved with the
+    joint model under ``room_limits`` within ``ROOM_RESOLVE_SECONDS``
+    while all other lessons stay where they are, and the rooms are matched
+    again. Returns ``(assignments, rooms)`` with the room id per (c_id, d, l).
+    Raises Exception if lessons are still left without a room, so that no
+    timetable with roomless lessons is saved.
+    """
+    if not problem.get("room_capacity"):
+        return assignments, {}
+    options = room_options(problem)
+    rooms, unplaced = assign_rooms(assignments, options)
+    if not unplaced:
+        return assignments, rooms
+
+    logger.warning(f"{len(unplaced)} lessons found no room, re-solving their slots.")
+    contested = defaultdict(set)
+    for c_id, s_id, t_id, d, l in unplaced:
+        contested[(d, l)].update(options[(c_id, s_id)])
+    freed = {
+        c_id
+        for c_id, s_id, t_id, d, l in assignments
+        if contested[(d, l)] & set(options[(c_id, s_id)])
+    }
+    frozen = [key for key in assignments if key[0] not in freed]
+    subproblem = neighbourhood_subproblem(problem, freed, frozen)
+    subproblem["hints"] = assignments
+    subproblem["room_limits"] = room_limits(subproblem, options, frozen, rooms)
+    parameters = problem.get("solver") or solver_parameters()
+    parameters = dict(
+        parameters,
+        max_time_in_seconds=min(parameters["max_time_in_seconds"], ROOM_RESOLVE_SECONDS),
+    )
+    model, reg = build_model(subproblem)
+    resolved = solve_model(model, reg, parameters=parameters)
+    if resolved is not None:
+        assignments = frozen + resolved
+        rooms, unplaced = assign_rooms(assignments, options)
+    if unplaced:
+        lines = [
+            f"class {c_id}, subject {s_id} on day {d}, lesson {l}"
+            for c_id, s_id, t_id, d, l in sorted(unplaced)
+        ]
+        for line in lines:
+            logger.error(f"No room for {line}.")
+        if len(lines) > MAX_UNPLACED_LISTED:
+            lines = lines[:MAX_UNPLACED_LISTED] + [f"... and {len(lines) - MAX_UNPLACED_LISTED} more"]
+        raise Exception(
+            f"Not enough rooms: {len(unplaced)} lessons found no room:\n" + "\n".join(lines)
+        )
+    return assignments, rooms
+
+
+def current_lessons():
+    """Active timetable as (c_id, s_id, t_id, d, l) keys."""
+    return list(
+        Lesson.objects.active().values_list(
+            "school_class_id", "subject_id", "teacher_id", "weekday", "lesson_number"
+        )
+    )
+
+
+def balance(assignments, class_shifts):
+    """Objective of the joint model: sum over classes of the busiest day
+    minus the quietest one."""
+    per_day = {(c_id, d): 0 for c_id in class_shifts for d in WEEKDAYS}
+    for c_id, s_id, t_id, d, l in assignments:
+        per_day[(c_id, d)] += 1
+    return sum(
+        max(per_day[(c_id, d)] for d in WEEKDAYS) - min(per_day[(c_id, d)] for d in WEEKDAYS)
+        for c_id in class_shifts
+    )
+
+
+@register_engine("joint")
+def solve_joint(problem, on_solution=None):
+    """Teacher choice and placement in one CP-SAT model."""
+    model, reg = build_model(problem)
+    return solve_model(model, reg, on_solution, problem.get("solver"))
+
+
+@register_engine("joint_symmetry")
+def solve_joint_symmetry(problem, on_solution=None):
+    """The joint model with interchangeable teachers and classes ordered."""
+    model, reg = build_model(problem, symmetry_breaking=True)
+    return solve_model(model, reg, on_solution, problem.get("solver"))
+
+
+@register_engine("two_phase")
+def solve_two_phase(problem, on_solution=None):
+    """
+    Assign teachers first, then place lessons with those teachers fixed;
+    falls back to the joint model if either phase fails.
+    """
+    fixed_teachers = assign_teachers(problem)
+    if fixed_teachers is not None:
+        model, reg = build_model(problem, fixed_teachers=fixed_teachers)
+        assignments = solve_model(model, reg, on_solution, problem.get("solver"))
+        if assignments is not None:
+            return assignments
+    logger.warning("Two-phase solve failed, falling back to the joint model.")
+    return solve_joint(problem, on_solution)
+
+
+@register_engine("shifts")
+def solve_shifts(problem, on_solution=None):
+    """
+    Solve each shift separately in parallel, see ``solve_by_shift``; falls
+    back to the joint model if that fails.
+    """
+    assignments = solve_by_shift(problem, on_solution)
+    if assignments is None:
+        logger.warning("Per-shift solve failed, falling back to the joint model.")
+        return solve_joint(problem, on_solution)
+    return assignments
+
+
+def generate_schedule(
+    engine="joint",
+    on_progress=None,
+    on_solution=None,
+    diagnose=False,
+    profile=None,
+    use_cache=True,
+    record=None,
+):
+    """
+    Generate balanced weekly schedule with one of the registered engines,
+    see ``schedule.engines``, and the solver parameter ``profile`` of
+    ``schedule.profiles``.
+
+    ``on_progress`` is called with the name of each stage as it starts and
+    ``on_solution`` with solver statistics, see ``SolutionProgress``; it
+    must be picklable for the "shifts" engine. With ``diagnose`` a failed
+    solve is followed by ``find_infeasibility_core`` and the conflicting
+    constraints are listed in the exception. With ``use_cache`` an input
+    solved before is answered from ``schedule.cache`` without solving, as
+    long as the active timetable still is that answer, and a similar one is
+    hinted from it. Step timings and model statistics are
+    collected in ``record`` (a new ``RunRecord`` if None) and logged.
+    Returns the ``ChangeSet`` applied to the stored timetable.
+    Raises Exception if validation fails or no solution found.
+    """
+    solve = get_engine(engine)
+    parameters = solver_parameters(profile)
+    on_progress = on_progress or (lambda stage: None)
+    record = record or RunRecord()
+    logger.info(f"Starting schedule generation with the {engine} engine...")
+
+    with recording(record):
+        # 1) Keep the current timetable as a warm start; it stays visible
+        # until the new version is activated
+        with record.span("previous"):
+            previous = current_lessons()
+
+        # 2-3) Load data
+        on_progress("loading")
+        with record.span("loading"):
+            problem, snapshot = load_problem()
+            digests = class_digests(problem)
+            fingerprint = problem_fingerprint(digests, engine, parameters)
+            cached = cached_assignments(fingerprint) if use_cache else None
+            problem["solver"] = parameters
+            # A timetable changed since the result was cached, by the LNS
+            # improver or rescheduling, is not replaced by the older result
+            # but solved again from itself
+            if cached is not None and set(cached) != set(previous):
+                logger.info("Active schedule differs from the cached result, solving.")
+                problem["hints"] = previous
+                cached = None
+            elif cached is None:
+                problem["hints"] = (near_hints(digests) if use_cache else None) or previous
+        if cached is not None:
+            on_progress("saving")
+            with record.span("saving"):
+                cached, rooms = place_rooms(problem, cached)
+                changeset = apply_changes(cached, rooms)
+            logger.info("Input unchanged, schedule taken from the solve cache.")
+            return changeset
+
+        # 4) Data validation
+        on_progress("validating")
+        with record.span("validating"):
+            validate_problem(problem, snapshot)
+
+        # 5-6) Build and solve the engine's model
+        on_progress("solving")
+        with record.span("solving"):
+            assignments = solve(problem, on_solution)
+        if assignments is None:
+            core = None
+            if diagnose:
+                with record.span("diagnosing"):
+                    core = find_infeasibility_core(problem)
+            if core:
+                raise Exception(
+                    "No solution found. Conflicting constraints:\n"
+                    + "\n".join(describe_core(core, problem, snapshot))
+                )
+            raise Exception("No solution found.")
+
+        # 7) Rooms, moving lessons only where the rooms run out
+        on_progress("rooms")
+        with record.span("rooms"):
+            assignments, rooms = place_rooms(problem, assignments)
+
+        # 8) Save only what changed against the active schedule
+        on_progress("saving")
+        with record.span("saving"):
+            store_result(fingerprint, digests, engine, assignments)
+            changeset = apply_changes(assignments, rooms)
     logger.info("Balanced schedule generated successfully.")
+    return changeset
+
+
+def reschedule(
+    teacher_ids=(),
+    class_ids=(),
+    subject_hours=(),
+    absent_teacher_ids=(),
+    profile=None,
+    on_progress=None,
+    on_solution=None,
+    record=None,
+):
+    """
+    Re-solve only the part of the stored timetable touched by a change.
+
+    Classes in ``class_ids``, classes of the (class_id, subject_id) pairs in
+    ``subject_hours`` and every class taught by a teacher in ``teacher_ids``
+    or ``absent_teacher_ids`` are freed; lessons of all other classes are
+    kept as they are. Absent teachers get no lessons in the new solution.
+    ``profile`` names the solver parameters, see ``schedule.profiles``;
+    ``on_progress``, ``on_solution`` and ``record`` are used as in
+    ``generate_schedule``. Run it as a job, see ``schedule.jobs``, so that
+    it never races a generation writing the same timetable.
+    Returns the ``ChangeSet`` applied to the stored timetable.
+    Raises Exception if validation fails or no solution found.
+    """
+    on_progress = on_progress or (lambda stage: None)
+    record = record or RunRecord()
+    logger.info("Starting incremental rescheduling...")
+
+    with recording(record):
+        on_progress("loading")
+        with record.span("loading"):
+            current = current_lessons()
+            full_problem, snapshot = load_problem()
+            full_problem["solver"] = solver_parameters(profile)
+
+            changed_teachers = set(teacher_ids) | set(absent_teacher_ids)
+            freed = set(class_ids) | {c_id for c_id, s_id in subject_hours}
+            freed |= {c_id for c_id, s_id, t_id, d, l in current if t_id in changed_teachers}
+            frozen = [key for key in current if key[0] not in freed]
+            for t_id in absent_teacher_ids:
+                full_problem["teacher_availability"][t_id] = set()
+
+            problem = neighbourhood_subproblem(full_problem, freed, frozen)
+            problem["hints"] = current
+        logger.info(f"Freed {len(freed)} classes, keeping {len(frozen)} lessons fixed.")
+
+        on_progress("validating")
+        with record.span("validating"):
+            validate_problem(problem, snapshot)
+
+        on_progress("solving")
+        with record.span("solving"):
+            model, reg = build_model(problem)
+            assignments = solve_model(model, reg, on_solution, problem["solver"])
+        if assignments is None:
+            raise Exception("No solution found.")
+
+        on_progress("rooms")
+        with record.span("rooms"):
+            assignments, rooms = place_rooms(full_problem, frozen + assignments)
+
+        on_progress("saving")
+        with record.span("saving"):
+            changeset = apply_changes(assignments, rooms)
+    logger.info("Incremental rescheduling finished.")
+    return changeset
@@ -0,0 +1,246 @@
+import logging
+
+from django.db import transaction
+
+from schedule.models import Lesson, ScheduleChange, ScheduleVersion
+from schedule.timetables import build_timetables
+
+logger = logging.getLogger(__name__)
+
+# Inactive versions kept for rollback with activate_version, besides the
+# active one
+KEEP_VERSIONS = 5
+# In-place changes of a version kept for undo_change
+KEEP_CHANGES = 20
+BATCH_SIZE = 1000
+
+
+def active_version():
+    return ScheduleVersion.objects.filter(is_active=True).first()
+
+
+def activate_version(version):
+    """Make ``version`` the one readers see, in a single transaction."""
+    with transaction.atomic():
+        # Lock the current pointer so concurrent switches serialize
+        list(ScheduleVersion.objects.select_for_update().filter(is_active=True))
+        ScheduleVersion.objects.filter(is_active=True).exclude(pk=version.pk).update(
+            is_active=False
+        )
+        ScheduleVersion.objects.filter(pk=version.pk).update(is_active=True)
+        build_timetables(version)
+    version.is_active = True
+    prune_versions()
+
+
+def prune_versions():
+    stale = ScheduleVersion.objects.filter(is_active=False).values_list("pk", flat=True)[
+        KEEP_VERSIONS:
+    ]
+    deleted, _ = ScheduleVersion.objects.filter(pk__in=list(stale)).delete()
+    if deleted:
+        logger.info(f"Pruned {deleted} rows of old schedule versions.")
+
+
+def save_version(assignments, rooms, note=""):
+    """
+    Write (c_id, s_id, t_id, d, l) keys as a new schedule version with
+    bulk inserts and switch readers to it. ``rooms`` maps (c_id, d, l) to
+    a room id, see ``schedule.rooms``. Returns the new version.
+    """
+    with transaction.atomic():
+        version = ScheduleVersion.objects.create(note=note)
+        Lesson.objects.bulk_create(
+            [
+                Lesson(
+                    version=version,
+                    school_class_id=c_id,
+                    subject_id=s_id,
+                    teacher_id=t_id,
+                    weekday=d,
+                    lesson_number=l,
+                    room_id=rooms.get((c_id, d, l)),
+                )
+                for c_id, s_id, t_id, d, l in assignments
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    activate_version(version)
+    logger.info(f"Saved {len(assignments)} lessons as schedule version {version.pk}.")
+    return version
+
+
+class ChangeSet:
+    """
+    Difference between two timetables, keyed on (class_id, weekday,
+    lesson_number) as in Lesson's unique_together. Each change is
+    ``(key, before, after)`` with (subject_id, teacher_id, room_id) values
+    and None for a missing lesson.
+    """
+
+    def __init__(self, changes=()):
+        self.changes = list(changes)
+
+    @property
+    def inserted(self):
+        return [c for c in self.changes if c[1] is None]
+
+    @property
+    def updated(self):
+        return [c for c in self.changes if c[1] is not None and c[2] is not None]
+
+    @property
+    def deleted(self):
+        return [c for c in self.changes if c[2] is None]
+
+    def class_ids(self):
+        return {key[0] for key, before, after in self.changes}
+
+    def teacher_ids(self):
+        return {
+            values[1]
+            for key, before, after in self.changes
+            for values in (before, after)
+            if values is not None
+        }
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def __str__(self):
+        return (
+            f"{len(self.inserted)} inserted, {len(self.updated)} updated, "
+            f"{len(self.deleted)} deleted"
+        )
+
+
+def diff_lessons(current, assignments, rooms):
+    """
+    ``ChangeSet`` turning ``current`` ({key: (lesson_id, values)}) into the
+    (c_id, s_id, t_id, d, l) ``assignments`` placed in ``rooms``.
+    """
+    target = {
+        (c_id, d, l): (s_id, t_id, rooms.get((c_id, d, l)))
+        for c_id, s_id, t_id, d, l in assignments
+    }
+    changes = []
+    for key, after in target.items():
+        before = current[key][1] if key in current else None
+        if before != after:
+            changes.append((key, before, after))
+    for key, (lesson_id, before) in current.items():
+        if key not in target:
+            changes.append((key, before, None))
+    return ChangeSet(changes)
+
+
+def version_lessons(version):
+    """Lessons of ``version`` as {(c_id, d, l): (lesson_id, (s_id, t_id, r_id))}."""
+    return {
+        (c_id, d, l): (pk, (s_id, t_id, r_id))
+        for pk, c_id, d, l, s_id, t_id, r_id in version.lessons.values_list(
+            "pk",
+            "school_class_id",
+            "weekday",
+            "lesson_number",
+            "subject_id",
+            "teacher_id",
+            "room_id",
+        )
+    }
+
+
+def write_changes(version, current, changeset):
+    """Write ``changeset`` to the ``current`` lessons of ``version``."""
+    Lesson.objects.filter(
+        pk__in=[current[key][0] for key, before, after in changeset.deleted]
+    ).delete()
+    Lesson.objects.bulk_update(
+        [
+            Lesson(
+                pk=current[key][0],
+                subject_id=after[0],
+                teacher_id=after[1],
+                room_id=after[2],
+            )
+            for key, before, after in changeset.updated
+        ],
+        ["subject", "teacher", "room"],
+        batch_size=BATCH_SIZE,
+    )
+    Lesson.objects.bulk_create(
+        [
+            Lesson(
+                version=version,
+                school_class_id=key[0],
+                weekday=key[1],
+                lesson_number=key[2],
+                subject_id=after[0],
+                teacher_id=after[1],
+                room_id=after[2],
+            )
+            for key, before, after in changeset.inserted
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    if changeset:
+        build_timetables(version, changeset.class_ids(), changeset.teacher_ids())
+
+
+def apply_changes(assignments, rooms):
+    """
+    Bring the active version in line with ``assignments`` placed in
+    ``rooms`` by inserting, updating and deleting only the lessons that
+    differ, in one transaction, and keep the previous lessons as a
+    ``ScheduleChange``. Without an active version a new one is saved.
+    Returns the ``ChangeSet``.
+    """
+    with transaction.atomic():
+        version = (
+            ScheduleVersion.objects.select_for_update().filter(is_active=True).first()
+        )
+        if version is None:
+            version = save_version(assignments, rooms)
+            return diff_lessons({}, assignments, rooms)
+
+        current = version_lessons(version)
+        changeset = diff_lessons(current, assignments, rooms)
+        write_changes(version, current, changeset)
+        if changeset:
+            ScheduleChange.objects.create(
+                version=version,
+                previous=[[list(key), before] for key, before, after in changeset.changes],
+            )
+            stale = version.changes.values_list("pk", flat=True)[KEEP_CHANGES:]
+            ScheduleChange.objects.filter(pk__in=list(stale)).delete()
+    logger.info(f"Applied schedule changes to version {version.pk}: {changeset}.")
+    return changeset
+
+
+def undo_change():
+    """
+    Restore the lessons the latest ``ScheduleChange`` of the active
+    version touched to what they were before it, also where they were
+    edited since. Returns the ``ChangeSet`` applied, or None if there
+    is nothing to undo.
+    """
+    with transaction.atomic():
+        version = (
+            ScheduleVersion.objects.select_for_update().filter(is_active=True).first()
+        )
+        change = version.changes.first() if version is not None else None
+        if change is None:
+            return None
+        current = version_lessons(version)
+        changes = []
+        for key, before in change.previous:
+            key = tuple(key)
+            now = current[key][1] if key in current else None
+            before = tuple(before) if before is not None else None
+            if now != before:
+                changes.append((key, now, before))
+        changeset = ChangeSet(changes)
+        write_changes(version, current, changeset)
+        change.delete()
+    logger.info(f"Undid schedule change {change.pk} of version {version.pk}: {changeset}.")
+    return changeset
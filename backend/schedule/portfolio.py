@@ -0,0 +1,107 @@
+import logging
+from functools import partial
+from multiprocessing import Pool
+
+from django.db import connections
+
+from schedule.engines import get_engine, register_engine
+from schedule.or_tools_scheduler import balance, init_worker
+from schedule.profiles import solver_parameters
+
+logger = logging.getLogger(__name__)
+
+# Engines raced by the portfolio with their random seeds. All of them
+# minimize ``balance``, so their results compare directly.
+PORTFOLIO = [
+    ("joint", 0),
+    ("compact", 0),
+    ("joint_symmetry", 0),
+    ("joint", 1),
+    ("compact", 1),
+]
+# A portfolio of one engine would only be that engine in another process
+MIN_MEMBERS = 2
+
+
+def member_name(engine, seed):
+    return f"{engine}/{seed}"
+
+
+def member_progress(on_solution, member, stats):
+    """``on_solution`` of one member: its statistics, marked with its name."""
+    return on_solution({**stats, "member": member})
+
+
+def solve_member(args):
+    member, engine, problem, on_solution = args
+    return member, get_engine(engine)(problem, on_solution)
+
+
+def race(problem, on_solution=None, first=False):
+    """
+    Solve ``problem`` with the ``PORTFOLIO`` engines in parallel processes,
+    splitting the search workers between them; at least ``MIN_MEMBERS``
+    race, sharing the CPUs if there are fewer. With ``first`` the first
+    solution found wins and the other processes are stopped; otherwise
+    the one with the lowest ``balance`` is kept once all of them finish.
+    ``on_solution`` receives the statistics of every member with its name
+    under "member", so it must be picklable. Returns the chosen
+    assignments or None.
+    """
+    parameters = problem.get("solver") or solver_parameters()
+    workers = parameters["num_search_workers"]
+    members = PORTFOLIO[: max(MIN_MEMBERS, workers)]
+    if workers < len(members):
+        logger.warning(
+            f"Portfolio of {len(members)} members shares {workers} search workers."
+        )
+    share = max(1, workers // len(members))
+    member_parameters = dict(parameters, num_search_workers=share)
+    if first:
+        # A member returns as soon as it has a solution, not when it ends
+        member_parameters["stop_after_first_solution"] = True
+    tasks = []
+    for engine, seed in members:
+        member = member_name(engine, seed)
+        tasks.append(
+            (
+                member,
+                engine,
+                {**problem, "solver": dict(member_parameters, random_seed=seed)},
+                on_solution and partial(member_progress, on_solution, member),
+            )
+        )
+
+    best = None
+    best_objective = None
+    # Pool rather than an executor: losing members are killed on terminate
+    # Connections must not be shared with the forked processes
+    connections.close_all()
+    pool = Pool(len(tasks), initializer=init_worker)
+    try:
+        for member, assignments in pool.imap_unordered(solve_member, tasks):
+            if assignments is None:
+                logger.info(f"Portfolio member {member} found no solution.")
+                continue
+            objective = balance(assignments, problem["class_shifts"])
+            logger.info(f"Portfolio member {member} finished with balance {objective}.")
+            if best is None or objective < best_objective:
+                best, best_objective = assignments, objective
+            if first:
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+    return best
+
+
+@register_engine("portfolio")
+def solve_portfolio(problem, on_solution=None):
+    """Race differently seeded and formulated models, keep the best result."""
+    return race(problem, on_solution)
+
+
+@register_engine("portfolio_first")
+def solve_portfolio_first(problem, on_solution=None):
+    """Race differently seeded and formulated models, keep the first result."""
+    return race(problem, on_solution, first=True)
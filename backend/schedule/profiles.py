@@ -0,0 +1,59 @@
+"""
+Named CP-SAT parameter profiles.
+
+A profile is a dict of ``SatParameters`` fields chosen per run.
+``solver_parameters`` resolves one by name, with the number of search
+workers defaulting to the CPU count. The result is plain data, so it is
+passed to the engines as ``problem["solver"]`` like the hints, including
+engines running in other processes.
+"""
+
+import os
+
+from ortools.sat.python import cp_model
+
+DEFAULT_PROFILE = "balanced"
+
+PROFILES = {
+    # Any timetable, as soon as possible
+    "fast_feasible": {
+        "max_time_in_seconds": 30,
+        "stop_after_first_solution": True,
+    },
+    "balanced": {
+        "max_time_in_seconds": 180,
+    },
+    # Long runs that are worth a stronger LP relaxation
+    "thorough": {
+        "max_time_in_seconds": 900,
+        "linearization_level": 2,
+    },
+}
+
+
+def profile_names():
+    return sorted(PROFILES)
+
+
+def solver_parameters(profile=None, **overrides):
+    """
+    Parameters of the profile named ``profile`` (``DEFAULT_PROFILE`` if
+    None) updated with ``overrides``. Raises ValueError for unknown names.
+    """
+    profile = profile or DEFAULT_PROFILE
+    if profile not in PROFILES:
+        raise ValueError(
+            f"Unknown solver profile {profile!r}, expected one of: {', '.join(profile_names())}"
+        )
+    parameters = {"num_search_workers": os.cpu_count() or 1}
+    parameters.update(PROFILES[profile])
+    parameters.update(overrides)
+    return parameters
+
+
+def make_solver(parameters=None, **overrides):
+    """A ``CpSolver`` set up with ``parameters`` (the default profile if None) and ``overrides``."""
+    solver = cp_model.CpSolver()
+    for field, value in {**(parameters or solver_parameters()), **overrides}.items():
+        setattr(solver.parameters, field, value)
+    return solver
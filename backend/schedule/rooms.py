@@ -0,0 +1,112 @@
+"""
+Room assignment for a solved timetable.
+
+A lesson may use the rooms equipped for its subject, or any general room
+(one without subjects) if the subject has no rooms of its own, as long
+as the room seats the class. Lessons only compete for rooms within one
+(day, slot), so each slot is a bipartite matching of its lessons to
+rooms. When a slot has no complete matching, ``room_limits`` gives the
+constraints under which the classes involved are re-solved, see
+``or_tools_scheduler.place_rooms``.
+"""
+
+from collections import defaultdict
+
+
+def room_options(problem):
+    """Suitable room ids of every (class, subject) key, smallest room first."""
+    capacity = problem["room_capacity"]
+    equipped = defaultdict(list)
+    general = []
+    for r_id, s_ids in problem["room_subjects"].items():
+        if not s_ids:
+            general.append(r_id)
+        for s_id in s_ids:
+            equipped[s_id].append(r_id)
+
+    options = {}
+    for c_id, s_id in problem["hours_map"]:
+        size = problem["class_sizes"][c_id]
+        options[(c_id, s_id)] = sorted(
+            (r_id for r_id in equipped.get(s_id) or general if capacity[r_id] >= size),
+            key=lambda r_id: (capacity[r_id], r_id),
+        )
+    return options
+
+
+def match_slot(lessons, options, preferred):
+    """
+    Maximum matching of the ``lessons`` of one slot to their room
+    ``options`` by augmenting paths, trying the ``preferred`` room of each
+    class first. Returns {lesson key: room id} for the lessons matched.
+    """
+    owner = {}
+
+    def choices(key):
+        rooms = options[key[:2]]
+        first = preferred.get(key[0])
+        if first in rooms:
+            return [first] + [r_id for r_id in rooms if r_id != first]
+        return rooms
+
+    def augment(key, seen):
+        for r_id in choices(key):
+            if r_id in seen:
+                continue
+            seen.add(r_id)
+            if r_id not in owner or augment(owner[r_id], seen):
+                owner[r_id] = key
+                return True
+        return False
+
+    for key in lessons:
+        augment(key, set())
+    return {key: r_id for r_id, key in owner.items()}
+
+
+def assign_rooms(assignments, options):
+    """
+    Rooms for the (c_id, s_id, t_id, d, l) ``assignments``, matched slot by
+    slot so that a class stays in the room of its previous lesson where
+    possible. Returns ``(rooms, unplaced)``: the room id per (c_id, d, l)
+    and the lessons left without a room.
+    """
+    by_slot = defaultdict(list)
+    for key in assignments:
+        by_slot[(key[3], key[4])].append(key)
+
+    rooms = {}
+    unplaced = []
+    last_room = {}
+    for d, l in sorted(by_slot):
+        lessons = sorted(by_slot[(d, l)])
+        matched = match_slot(lessons, options, last_room)
+        for key in lessons:
+            if key in matched:
+                rooms[(key[0], d, l)] = matched[key]
+                last_room[key[0]] = matched[key]
+            else:
+                unplaced.append(key)
+    return rooms, unplaced
+
+
+def room_limits(problem, options, frozen, rooms):
+    """
+    Limits for re-solving the classes of ``problem`` next to the ``frozen``
+    lessons placed in ``rooms``: for every distinct set of suitable rooms,
+    the class-subjects that fit only into that set may not have more
+    lessons in a slot than the set has rooms left free by frozen lessons.
+    Returns (keys, rooms in the set, {(d, l): free rooms where fewer}) triples.
+    """
+    used = defaultdict(set)
+    for c_id, s_id, t_id, d, l in frozen:
+        if (c_id, d, l) in rooms:
+            used[(d, l)].add(rooms[(c_id, d, l)])
+
+    limits = []
+    for room_set in {frozenset(options[key]) for key in problem["hours_map"]}:
+        keys = [key for key in problem["hours_map"] if room_set.issuperset(options[key])]
+        free = {slot: len(room_set - taken) for slot, taken in used.items() if room_set & taken}
+        if len(keys) > min([len(room_set), *free.values()]):
+            limits.append((keys, len(room_set), free))
+    return limits
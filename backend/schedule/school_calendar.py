@@ -0,0 +1,104 @@
+"""
+Dated lessons from the weekly timetable.
+
+The active version holds one week of ``Lesson`` rows: a date has the
+lessons of its weekday unless it falls on a Sunday or a ``Holiday``.
+Holidays are kept as one bitmap per academic year (``HolidayCalendar``),
+so whether a date is a school day is one bit test once its year is
+loaded, and a date range is expanded lazily from the week instead of
+storing a row per dated lesson.
+"""
+
+import datetime
+import logging
+
+from schedule.models import Holiday, HolidayCalendar, Lesson
+from users.models import WEEKDAYS
+
+logger = logging.getLogger(__name__)
+
+# Month and day the academic year starts on
+YEAR_START = (9, 1)
+
+
+def academic_year(day):
+    """Calendar year in which the academic year of ``day`` starts."""
+    return day.year if (day.month, day.day) >= YEAR_START else day.year - 1
+
+
+def year_bounds(year):
+    """First day of academic ``year`` and first day of the next one."""
+    return datetime.date(year, *YEAR_START), datetime.date(year + 1, *YEAR_START)
+
+
+def build_bitmap(year):
+    """Holiday bitmap of academic ``year`` from the ``Holiday`` rows."""
+    start, end = year_bounds(year)
+    bitmap = bytearray(((end - start).days + 7) // 8)
+    for day in Holiday.objects.filter(date__gte=start, date__lt=end).values_list(
+        "date", flat=True
+    ):
+        i = (day - start).days
+        bitmap[i >> 3] |= 1 << (i & 7)
+    return bytes(bitmap)
+
+
+def refresh_holidays(dates):
+    """Rebuild the stored bitmaps of the academic years of ``dates``."""
+    for year in sorted({academic_year(day) for day in dates}):
+        HolidayCalendar.objects.update_or_create(
+            year=year, defaults={"bitmap": build_bitmap(year)}
+        )
+        logger.info(f"Holiday calendar of {year}/{year + 1} rebuilt.")
+
+
+class SchoolCalendar:
+    """
+    School days by date. Bitmaps are read from ``HolidayCalendar`` once
+    per academic year and instance; a missing one is built and stored.
+    """
+
+    def __init__(self):
+        self.bitmaps = {}
+
+    def bitmap(self, year):
+        if year not in self.bitmaps:
+            # A callable default is only built when the row is missing
+            row, _ = HolidayCalendar.objects.get_or_create(
+                year=year, defaults={"bitmap": lambda: build_bitmap(year)}
+            )
+            self.bitmaps[year] = bytes(row.bitmap)
+        return self.bitmaps[year]
+
+    def is_holiday(self, day):
+        year = academic_year(day)
+        i = (day - year_bounds(year)[0]).days
+        return bool(self.bitmap(year)[i >> 3] & (1 << (i & 7)))
+
+    def is_school_day(self, day):
+        return day.isoweekday() <= len(WEEKDAYS) and not self.is_holiday(day)
+
+
+def week_template(lessons):
+    """Lessons of the active version grouped by weekday, in lesson order."""
+    week = {}
+    for lesson in lessons.active().order_by("weekday", "lesson_number"):
+        week.setdefault(lesson.weekday, []).append(lesson)
+    return week
+
+
+def occurrences(start, end, lessons=None, calendar=None):
+    """
+    Yield ``(date, lessons)`` for every school day from ``start`` to
+    ``end`` inclusive, with the lessons of the date's weekday taken from
+    the ``lessons`` queryset (all lessons by default). The week is read
+    in one query; dates are produced as they are consumed.
+    """
+    week = week_template(Lesson.objects.all() if lessons is None else lessons)
+    calendar = calendar or SchoolCalendar()
+    day = start
+    while day <= end:
+        if calendar.is_school_day(day):
+            yield day, week.get(day.isoweekday(), [])
+        day += datetime.timedelta(days=1)
+
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import *
+from .profiles import DEFAULT_PROFILE, profile_names
+from users.models import Teacher
 from users.serializers import TeacherShortSerializer
 
 
@@ -31,3 +33,68 @@ class SchoolClassSerializer(serializers.ModelSerializer):
 
     def get_name(self, obj):
         return f"{obj.grade.number}{obj.letter}"
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenerationJob
+        fields = [
+            "id",
+            "kind",
+            "engine",
+            "profile",
+            "options",
+            "status",
+            "stage",
+            "error",
+            "objective",
+            "best_bound",
+            "gap",
+            "elapsed",
+            "solution_count",
+            "member",
+            "metrics",
+            "stop_requested",
+            "worker",
+            "heartbeat_at",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+
+class RescheduleSerializer(serializers.Serializer):
+    """Arguments of a rescheduling job, see or_tools_scheduler.reschedule."""
+
+    OPTIONS = ("absent_teacher_ids", "teacher_ids", "class_ids", "subject_hours")
+
+    absent_teacher_ids = serializers.PrimaryKeyRelatedField(
+        queryset=Teacher.objects.all(), many=True, required=False
+    )
+    teacher_ids = serializers.PrimaryKeyRelatedField(
+        queryset=Teacher.objects.all(), many=True, required=False
+    )
+    class_ids = serializers.PrimaryKeyRelatedField(
+        queryset=SchoolClass.objects.all(), many=True, required=False
+    )
+    # (class id, subject id) pairs whose weekly hours changed
+    subject_hours = serializers.ListField(
+        child=serializers.ListField(
+            child=serializers.IntegerField(), min_length=2, max_length=2
+        ),
+        required=False,
+    )
+    profile = serializers.ChoiceField(choices=profile_names(), default=DEFAULT_PROFILE)
+
+    def validate(self, attrs):
+        if not any(attrs.get(name) for name in self.OPTIONS):
+            raise serializers.ValidationError("Укажите, что изменилось в расписании.")
+        return attrs
+
+    def options(self):
+        """Validated arguments as lists of ids, without the profile."""
+        options = {}
+        for name in self.OPTIONS:
+            values = self.validated_data.get(name, [])
+            options[name] = [getattr(value, "pk", value) for value in values]
+        return options
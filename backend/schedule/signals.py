@@ -0,0 +1,67 @@
+"""
+Keep the timetable documents of schedule.timetables in step with the
+names they copy. Renaming a class, teacher, subject or room rebuilds the
+documents of the active lessons that show it; deleting one rebuilds them
+once its lessons are gone or have lost the room. Lessons themselves are
+not watched here: their write paths rebuild explicitly, since signals
+would also fire for every lesson of bulk deletes.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from schedule.models import (
+    GradeLevel,
+    Lesson,
+    Room,
+    SchoolClass,
+    Subject,
+    TimetableDocument,
+    TimetableKind,
+)
+from schedule.timetables import lesson_owners, rebuild_timetables
+from users.models import Teacher
+
+# Fields copied into the documents, and the lessons that copy them
+SHOWN_FIELDS = {
+    GradeLevel: ({"number"}, "school_class__grade"),
+    SchoolClass: ({"grade", "letter"}, "school_class"),
+    Teacher: ({"last_name", "first_name", "middle_name"}, "teacher"),
+    Subject: ({"name"}, "subject"),
+    Room: ({"name"}, "room"),
+}
+OWNER_KINDS = {SchoolClass: TimetableKind.CLASS, Teacher: TimetableKind.TEACHER}
+
+
+def shown_in(instance):
+    fields, lookup = SHOWN_FIELDS[type(instance)]
+    return Lesson.objects.active().filter(**{lookup: instance})
+
+
+def rebuild_on_rename(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    fields, lookup = SHOWN_FIELDS[sender]
+    if update_fields is not None and not fields & set(update_fields):
+        return
+    rebuild_timetables(*lesson_owners(shown_in(instance)))
+
+
+def remember_owners(sender, instance, **kwargs):
+    instance._timetable_owners = lesson_owners(shown_in(instance))
+
+
+def rebuild_on_delete(sender, instance, **kwargs):
+    class_ids, teacher_ids = getattr(instance, "_timetable_owners", (set(), set()))
+    if sender in OWNER_KINDS:
+        TimetableDocument.objects.filter(kind=OWNER_KINDS[sender], owner_id=instance.pk).delete()
+        (class_ids if sender is SchoolClass else teacher_ids).discard(instance.pk)
+    rebuild_timetables(class_ids, teacher_ids)
+
+
+def connect():
+    # Per sender: a receiver for all senders would also disable fast
+    # deletes of lessons
+    for model in SHOWN_FIELDS:
+        post_save.connect(rebuild_on_rename, sender=model)
+        pre_delete.connect(remember_owners, sender=model)
+        post_delete.connect(rebuild_on_delete, sender=model)
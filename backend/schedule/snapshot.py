@@ -0,0 +1,164 @@
+from collections import defaultdict
+from dataclasses import dataclass
+
+from schedule.models import (
+    Holiday,
+    Room,
+    SchoolClass,
+    StudyPlanEntry,
+    Subject,
+    SubjectHours,
+)
+from users.models import Teacher, work_time_slots
+
+
+@dataclass(frozen=True)
+class ProblemSnapshot:
+    """
+    Read-only copy of everything the engines need, loaded in a fixed number
+    of queries however large the school is.
+
+    Classes, subjects, teachers and rooms are numbered 0..n-1 in id order;
+    the ``*_ids`` tuples map an index back to the database id and all other
+    per-entity tuples are aligned with them. ``hours`` holds
+    (class index, subject index, weekly hours) triples, ``teacher_subjects``
+    subject indexes and ``teacher_availability`` (day, lesson) pairs, or
+    None when the teacher has no work_time grid. ``room_subjects`` holds the
+    subject indexes a room is equipped for, and ``holidays`` the dates of
+    all ``Holiday`` rows, so that a run reads every input from one load.
+    """
+
+    class_ids: tuple
+    class_names: tuple
+    class_grades: tuple
+    class_shifts: tuple
+    class_sizes: tuple
+    subject_ids: tuple
+    subject_names: tuple
+    subject_difficulty: tuple
+    teacher_ids: tuple
+    teacher_names: tuple
+    teacher_subjects: tuple
+    teacher_max_hours: tuple
+    teacher_availability: tuple
+    hours: tuple
+    room_ids: tuple
+    room_names: tuple
+    room_capacity: tuple
+    room_subjects: tuple
+    holidays: frozenset
+
+    @classmethod
+    def load(cls, default_max_hours):
+        """
+        Load the snapshot in nine queries. Classes without SubjectHours rows
+        take the hours of their study plan; teachers without
+        ``max_hours_per_week`` in work_time get ``default_max_hours``.
+        """
+        classes = list(
+            SchoolClass.objects.order_by("pk").values_list(
+                "pk", "grade__number", "letter", "shift", "study_plan_id", "students"
+            )
+        )
+        subjects = list(Subject.objects.order_by("pk").values_list("pk", "name", "difficulty"))
+        teachers = list(
+            Teacher.objects.order_by("pk").values_list("pk", "last_name", "first_name", "work_time")
+        )
+        qualifications = Teacher.subjects.through.objects.values_list("teacher_id", "subject_id")
+        rooms = list(Room.objects.order_by("pk").values_list("pk", "name", "capacity"))
+        room_equipment = Room.subjects.through.objects.values_list("room_id", "subject_id")
+
+        class_index = {c_id: ci for ci, (c_id, *rest) in enumerate(classes)}
+        subject_index = {s_id: si for si, (s_id, *rest) in enumerate(subjects)}
+        teacher_index = {t_id: ti for ti, (t_id, *rest) in enumerate(teachers)}
+
+        class_hours = defaultdict(dict)
+        for c_id, s_id, hrs in SubjectHours.objects.values_list(
+            "school_class_id", "subject_id", "hours_per_week"
+        ):
+            class_hours[class_index[c_id]][subject_index[s_id]] = hrs
+        plan_hours = defaultdict(dict)
+        for plan_id, s_id, hrs in StudyPlanEntry.objects.values_list(
+            "study_plan_id", "subject_id", "hours_per_week"
+        ):
+            plan_hours[plan_id][subject_index[s_id]] = hrs
+        hours = []
+        for ci, (c_id, number, letter, shift, plan_id, students) in enumerate(classes):
+            rows = class_hours.get(ci) or plan_hours.get(plan_id, {})
+            hours.extend((ci, si, hrs) for si, hrs in sorted(rows.items()))
+
+        teacher_subjects = [set() for _ in teachers]
+        for t_id, s_id in qualifications:
+            teacher_subjects[teacher_index[t_id]].add(subject_index[s_id])
+
+        availability = []
+        for t_id, last_name, first_name, work_time in teachers:
+            slots = work_time_slots(work_time)
+            availability.append(None if slots is None else frozenset(slots))
+
+        room_index = {r_id: ri for ri, (r_id, *rest) in enumerate(rooms)}
+        room_subjects = [set() for _ in rooms]
+        for r_id, s_id in room_equipment:
+            room_subjects[room_index[r_id]].add(subject_index[s_id])
+
+        return cls(
+            class_ids=tuple(row[0] for row in classes),
+            class_names=tuple(f"{number}{letter}" for c_id, number, letter, *rest in classes),
+            class_grades=tuple(row[1] for row in classes),
+            class_shifts=tuple(row[3] for row in classes),
+            class_sizes=tuple(row[5] for row in classes),
+            subject_ids=tuple(row[0] for row in subjects),
+            subject_names=tuple(row[1] for row in subjects),
+            subject_difficulty=tuple(row[2] for row in subjects),
+            teacher_ids=tuple(row[0] for row in teachers),
+            teacher_names=tuple(f"{last_name} {first_name}" for t_id, last_name, first_name, w in teachers),
+            teacher_subjects=tuple(frozenset(s) for s in teacher_subjects),
+            teacher_max_hours=tuple(
+                row[3].get("max_hours_per_week", default_max_hours) for row in teachers
+            ),
+            teacher_availability=tuple(availability),
+            hours=tuple(hours),
+            room_ids=tuple(row[0] for row in rooms),
+            room_names=tuple(row[1] for row in rooms),
+            room_capacity=tuple(row[2] for row in rooms),
+            room_subjects=tuple(frozenset(s) for s in room_subjects),
+            holidays=frozenset(Holiday.objects.values_list("date", flat=True)),
+        )
+
+    def class_labels(self):
+        return dict(zip(self.class_ids, self.class_names))
+
+    def subject_labels(self):
+        return dict(zip(self.subject_ids, self.subject_names))
+
+    def teacher_labels(self):
+        return dict(zip(self.teacher_ids, self.teacher_names))
+
+    def problem(self):
+        """
+        The snapshot as the id-keyed plain data the engines take. Every call
+        returns fresh containers, so callers may adjust them freely.
+        """
+        return {
+            "class_shifts": dict(zip(self.class_ids, self.class_shifts)),
+            "class_grades": dict(zip(self.class_ids, self.class_grades)),
+            "hours_map": {
+                (self.class_ids[ci], self.subject_ids[si]): hrs for ci, si, hrs in self.hours
+            },
+            "teacher_subjects": {
+                t_id: {self.subject_ids[si] for si in s_idx}
+                for t_id, s_idx in zip(self.teacher_ids, self.teacher_subjects)
+            },
+            "teacher_max_hours": dict(zip(self.teacher_ids, self.teacher_max_hours)),
+            "teacher_availability": {
+                t_id: None if slots is None else set(slots)
+                for t_id, slots in zip(self.teacher_ids, self.teacher_availability)
+            },
+            "subject_difficulty": dict(zip(self.subject_ids, self.subject_difficulty)),
+            "class_sizes": dict(zip(self.class_ids, self.class_sizes)),
+            "room_capacity": dict(zip(self.room_ids, self.room_capacity)),
+            "room_subjects": {
+                r_id: {self.subject_ids[si] for si in s_idx}
+                for r_id, s_idx in zip(self.room_ids, self.room_subjects)
+            },
+        }
@@ -0,0 +1,212 @@
+"""
+Seeded synthetic schools for benchmarking the engines against a database.
+
+``create_school`` replaces the timetable input with a school shaped like a
+Russian basic and secondary school: study plans per grade, classes spread
+over grades 4–11 and both shifts, and teachers grouped by speciality with
+enough weekly hours for the plan, some of them with a day off. The
+benchmark commands create their schools in ``benchmark_database``.
+"""
+
+import math
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+
+from schedule.models import (
+    DifficultyLevel,
+    GradeLevel,
+    Lesson,
+    Room,
+    SchoolClass,
+    ScheduleVersion,
+    Shift,
+    SolveResult,
+    StudyPlan,
+    StudyPlanEntry,
+    Subject,
+    SubjectArea,
+    SubjectHours,
+)
+from users.models import LESSONS, WEEKDAYS, Teacher
+
+GRADES = list(range(4, 12))
+LETTERS = "АБВГДЕЖЗИКЛМНОПРСТУФХЦЧШЩЭЮЯ"
+MAX_CLASSES = len(GRADES) * len(LETTERS)
+SECOND_SHIFT_GRADES = {4, 6, 7}
+
+# name, area, difficulty, weekly hours in grades 4 to 11
+SUBJECTS = [
+    ("Русский язык", SubjectArea.LANGUAGE, DifficultyLevel.HARD, (5, 5, 6, 4, 3, 3, 2, 2)),
+    ("Литература", SubjectArea.LANGUAGE, DifficultyLevel.MEDIUM, (4, 3, 3, 2, 2, 3, 3, 3)),
+    ("Иностранный язык", SubjectArea.FOREIGN, DifficultyLevel.MEDIUM, (2, 3, 3, 3, 3, 3, 3, 3)),
+    ("Математика", SubjectArea.MATH, DifficultyLevel.HARD, (4, 5, 5, 0, 0, 0, 0, 0)),
+    ("Алгебра", SubjectArea.MATH, DifficultyLevel.HARD, (0, 0, 0, 3, 3, 3, 3, 3)),
+    ("Геометрия", SubjectArea.MATH, DifficultyLevel.HARD, (0, 0, 0, 2, 2, 2, 2, 2)),
+    ("Информатика", SubjectArea.MATH, DifficultyLevel.MEDIUM, (0, 0, 0, 1, 1, 1, 1, 1)),
+    ("История", SubjectArea.SOCIAL, DifficultyLevel.MEDIUM, (0, 2, 2, 2, 2, 2, 2, 2)),
+    ("Обществознание", SubjectArea.SOCIAL, DifficultyLevel.MEDIUM, (0, 0, 1, 1, 1, 1, 2, 2)),
+    ("Окружающий мир", SubjectArea.NATURAL, DifficultyLevel.EASY, (2, 0, 0, 0, 0, 0, 0, 0)),
+    ("География", SubjectArea.NATURAL, DifficultyLevel.EASY, (0, 1, 1, 2, 2, 2, 0, 0)),
+    ("Биология", SubjectArea.NATURAL, DifficultyLevel.MEDIUM, (0, 1, 1, 1, 2, 2, 1, 1)),
+    ("Физика", SubjectArea.NATURAL, DifficultyLevel.HARD, (0, 0, 0, 2, 2, 3, 2, 2)),
+    ("Химия", SubjectArea.NATURAL, DifficultyLevel.HARD, (0, 0, 0, 0, 2, 2, 2, 2)),
+    ("Музыка", SubjectArea.ART, DifficultyLevel.EASY, (1, 1, 1, 1, 1, 0, 0, 0)),
+    ("Изобразительное искусство", SubjectArea.ART, DifficultyLevel.EASY, (1, 1, 1, 1, 0, 0, 0, 0)),
+    ("Технология", SubjectArea.TECHNOLOGY, DifficultyLevel.EASY, (1, 2, 2, 2, 1, 0, 0, 0)),
+    ("Физкультура", SubjectArea.SPORT, DifficultyLevel.EASY, (2, 3, 3, 3, 3, 3, 2, 2)),
+    ("ОБЖ", SubjectArea.SPORT, DifficultyLevel.EASY, (0, 0, 0, 0, 1, 1, 1, 1)),
+]
+
+# Subjects a teacher of each speciality is qualified for
+SPECIALITIES = [
+    ["Русский язык", "Литература"],
+    ["Иностранный язык"],
+    ["Математика", "Алгебра", "Геометрия"],
+    ["Информатика"],
+    ["История", "Обществознание"],
+    ["Окружающий мир", "Изобразительное искусство", "Музыка"],
+    ["География", "Биология"],
+    ["Физика"],
+    ["Химия"],
+    ["Технология"],
+    ["Физкультура", "ОБЖ"],
+]
+
+TEACHER_LOADS = [18, 24, 27]
+# Teachers' hours over the plan hours of their speciality
+SLACK = 1.25
+DAY_OFF_SHARE = 0.25
+
+
+def school_classes(num_classes):
+    """(grade, letter) of ``num_classes`` classes spread evenly over ``GRADES``."""
+    if not 1 <= num_classes <= MAX_CLASSES:
+        raise ValueError(f"A synthetic school has 1 to {MAX_CLASSES} classes, not {num_classes}")
+    return [
+        (GRADES[i % len(GRADES)], LETTERS[i // len(GRADES)]) for i in range(num_classes)
+    ]
+
+
+def clear_school():
+    """Delete the timetable input and every generated timetable."""
+    for model in (
+        Lesson,
+        ScheduleVersion,
+        SolveResult,
+        SubjectHours,
+        SchoolClass,
+        StudyPlanEntry,
+        StudyPlan,
+        Teacher,
+        Subject,
+    ):
+        model.objects.all().delete()
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """
+    Switch the default connection to a throwaway test database for the
+    block, so that synthetic schools never replace the real input.
+    """
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+        # Engine runs use their own processes, which cannot share an in-memory database
+        test_settings["NAME"] = os.path.join(tempfile.gettempdir(), "benchmark_engines.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def create_school(num_classes, seed=0):
+    """
+    Replace the timetable input with a synthetic school of ``num_classes``
+    classes; the same ``seed`` gives the same school. Returns a summary
+    with the numbers of classes, teachers and weekly lessons.
+    """
+    rnd = random.Random(seed)
+    classes = school_classes(num_classes)
+    clear_school()
+
+    subjects = {
+        name: Subject.objects.create(name=name, subject_area=area, difficulty=difficulty)
+        for name, area, difficulty, hours in SUBJECTS
+    }
+    plan_hours = {
+        name: dict(zip(GRADES, hours)) for name, area, difficulty, hours in SUBJECTS
+    }
+    plans = {}
+    for grade in GRADES:
+        plans[grade] = StudyPlan.objects.create(name=f"Синтетический {grade}")
+        StudyPlanEntry.objects.bulk_create(
+            [
+                StudyPlanEntry(
+                    study_plan=plans[grade], subject=subjects[name], hours_per_week=hours[grade]
+                )
+                for name, hours in plan_hours.items()
+                if hours[grade]
+            ]
+        )
+
+    grade_levels = {grade: GradeLevel.objects.get_or_create(number=grade)[0] for grade in GRADES}
+    SchoolClass.objects.bulk_create(
+        [
+            SchoolClass(
+                grade=grade_levels[grade],
+                letter=letter,
+                shift=Shift.SECOND if grade in SECOND_SHIFT_GRADES else Shift.FIRST,
+                study_plan=plans[grade],
+            )
+            for grade, letter in classes
+        ]
+    )
+    Room.objects.bulk_create(
+        [Room(name=str(101 + i)) for i in range(num_classes)], ignore_conflicts=True
+    )
+
+    # Teachers of each speciality cover its plan hours with some slack
+    demand = {
+        name: sum(hours[grade] for grade, letter in classes)
+        for name, hours in plan_hours.items()
+    }
+    teachers = []
+    qualifications = []
+    for speciality in SPECIALITIES:
+        needed = math.ceil(SLACK * sum(demand[name] for name in speciality))
+        while needed > 0:
+            load = rnd.choice(TEACHER_LOADS)
+            needed -= load
+            work_time = {"max_hours_per_week": load}
+            if rnd.random() < DAY_OFF_SHARE:
+                day_off = rnd.choice(WEEKDAYS)
+                work_time.update(
+                    {day: [] if day == day_off else list(LESSONS) for day in WEEKDAYS}
+                )
+            number = len(teachers) + 1
+            teachers.append(
+                Teacher(
+                    username=f"synthetic{number}",
+                    last_name=f"Учитель{number}",
+                    work_time=work_time,
+                )
+            )
+            qualifications.append(speciality)
+    teachers = Teacher.objects.bulk_create(teachers)
+    Teacher.subjects.through.objects.bulk_create(
+        [
+            Teacher.subjects.through(teacher_id=teacher.pk, subject_id=subjects[name].pk)
+            for teacher, speciality in zip(teachers, qualifications)
+            for name in speciality
+        ]
+    )
+    return {
+        "classes": num_classes,
+        "teachers": len(teachers),
+        "lessons": sum(demand.values()),
+    }
@@ -1,3 +1,539 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from schedule import or_tools_scheduler
+from schedule.cache import class_digests, problem_fingerprint
+from schedule.jobs import ORPHAN_AFTER, claim_job
+from schedule.models import (
+    GenerationJob,
+    GradeLevel,
+    Holiday,
+    HolidayCalendar,
+    JobKind,
+    JobStatus,
+    Lesson,
+    Room,
+    ScheduleChange,
+    ScheduleVersion,
+    SchoolClass,
+    SolveResult,
+    StudyPlan,
+    StudyPlanEntry,
+    Subject,
+    SubjectHours,
+    TimetableDocument,
+)
+from schedule.or_tools_scheduler import (
+    capacity_conflicts,
+    candidate_teachers,
+    current_lessons,
+    generate_schedule,
+    load_problem,
+    reschedule,
+    validate_problem,
+)
+from schedule.persistence import apply_changes, diff_lessons, save_version, undo_change
+from schedule.rooms import assign_rooms, match_slot, room_limits, room_options
+from schedule.school_calendar import (
+    SchoolCalendar,
+    academic_year,
+    build_bitmap,
+    occurrences,
+    refresh_holidays,
+)
+from schedule.snapshot import ProblemSnapshot
+from users.models import LESSONS, WEEKDAYS, AdminUser, Teacher
+
+# name, difficulty, weekly hours
+PLAN = [
+    ("Математика", "hard", 5),
+    ("Русский язык", "medium", 4),
+    ("История", "easy", 2),
+    ("Физкультура", "easy", 3),
+    ("Биология", "medium", 2),
+]
+
+
+def create_small_school(num_classes=4, rooms=4):
+    """
+    Classes of one study plan in both shifts and two teachers per subject,
+    the second one working only four days.
+    """
+    subjects = [
+        Subject.objects.create(name=name, subject_area="other", difficulty=difficulty)
+        for name, difficulty, hours in PLAN
+    ]
+    plan = StudyPlan.objects.create(name="5")
+    for subject, (name, difficulty, hours) in zip(subjects, PLAN):
+        StudyPlanEntry.objects.create(study_plan=plan, subject=subject, hours_per_week=hours)
+    for i in range(num_classes):
+        grade, _ = GradeLevel.objects.get_or_create(number=5 + i // 2)
+        school_class = SchoolClass.objects.create(
+            grade=grade, letter="АБ"[i % 2], shift="1" if i % 3 != 2 else "2", study_plan=plan
+        )
+        for subject, (name, difficulty, hours) in zip(subjects, PLAN):
+            SubjectHours.objects.create(
+                school_class=school_class, subject=subject, hours_per_week=hours
+            )
+    for subject in subjects:
+        for j in range(2):
+            work_time = {} if j == 0 else {
+                day: list(LESSONS) if day in WEEKDAYS[:4] else [] for day in WEEKDAYS
+            }
+            teacher = Teacher.objects.create(
+                username=f"{subject.pk}-{j}", last_name=f"{subject.name} {j}", work_time=work_time
+            )
+            teacher.subjects.set([subject])
+    for i in range(rooms):
+        Room.objects.create(name=str(101 + i))
+    return subjects
+
+
+class RescheduleTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        generate_schedule(profile="fast_feasible", use_cache=False)
+        self.before = set(current_lessons())
+        biology = Subject.objects.get(name="Биология")
+        self.absent = Lesson.objects.active().filter(subject=biology).first().teacher_id
+        self.untouched = {c_id for c_id, s_id, t_id, d, l in self.before} - {
+            c_id for c_id, s_id, t_id, d, l in self.before if t_id == self.absent
+        }
+
+    def assert_rescheduled(self):
+        after = set(current_lessons())
+        self.assertEqual(Lesson.objects.active().filter(teacher_id=self.absent).count(), 0)
+        self.assertEqual(len(after), len(self.before))
+        self.assertEqual(
+            {key for key in after if key[0] in self.untouched},
+            {key for key in self.before if key[0] in self.untouched},
+        )
+
+    def test_absent_teacher_gets_no_lessons(self):
+        changeset = reschedule(absent_teacher_ids=[self.absent], profile="fast_feasible")
+        self.assert_rescheduled()
+        self.assertTrue(changeset.class_ids().isdisjoint(self.untouched))
+
+    def test_command_runs_a_reschedule_job(self):
+        call_command(
+            "reschedule", "--absent", str(self.absent), "--profile", "fast_feasible",
+            stdout=StringIO(),
+        )
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.kind, JobKind.RESCHEDULE)
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        self.assertEqual(job.options["absent_teacher_ids"], [self.absent])
+        self.assert_rescheduled()
+
+    def test_api_rejects_a_reschedule_without_changes(self):
+        client = APIClient()
+        client.force_authenticate(AdminUser.objects.create_user("admin", "password"))
+        response = client.post("/api/generation-jobs/reschedule/", {}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = client.post(
+            "/api/generation-jobs/reschedule/", {"absent_teacher_ids": [0]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GenerationJob.objects.exists())
+
+
+class RoomShortageTests(TestCase):
+    def test_lessons_without_rooms_fail_generation(self):
+        create_small_school(num_classes=4, rooms=1)
+        with self.assertLogs("schedule.or_tools_scheduler", "ERROR"):
+            with self.assertRaisesMessage(Exception, "Not enough rooms"):
+                generate_schedule(profile="fast_feasible", use_cache=False)
+        self.assertFalse(Lesson.objects.exists())
+
+
+def some_lessons():
+    """One lesson of every class of ``create_small_school``, in the first slot."""
+    teacher = Teacher.objects.order_by("pk").first()
+    subject = teacher.subjects.get()
+    return [
+        (c_id, subject.pk, teacher.pk, 1, i + 1)
+        for i, c_id in enumerate(SchoolClass.objects.order_by("pk").values_list("pk", flat=True))
+    ]
+
+
+class ScheduleVersionAdminTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        self.client.force_login(AdminUser.objects.create_superuser("admin", "password"))
+        lessons = some_lessons()
+        self.old = save_version(lessons[:1], {})
+        self.new = save_version(lessons, {})
+
+    def test_activate_action_switches_versions_and_documents(self):
+        response = self.client.post(
+            "/admin/schedule/scheduleversion/",
+            {"action": "activate", "_selected_action": [self.old.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(ScheduleVersion.objects.filter(is_active=True)), [self.old])
+        self.assertEqual(
+            set(TimetableDocument.objects.values_list("version_id", flat=True)), {self.old.pk}
+        )
+
+    def test_is_active_is_read_only(self):
+        response = self.client.get(f"/admin/schedule/scheduleversion/{self.new.pk}/change/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'name="is_active"')
+
+
+class ClaimJobTests(TestCase):
+    def running_job(self, worker, last_seen):
+        return GenerationJob.objects.create(
+            status=JobStatus.RUNNING, worker=worker, started_at=last_seen, heartbeat_at=last_seen
+        )
+
+    def test_job_of_a_silent_worker_on_another_host_is_failed(self):
+        stale = self.running_job("elsewhere:1", timezone.now() - ORPHAN_AFTER * 2)
+        queued = GenerationJob.objects.create()
+        self.assertEqual(claim_job(), queued.pk)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, JobStatus.FAILED)
+
+    def test_job_of_a_live_worker_blocks_the_queue(self):
+        running = self.running_job("elsewhere:1", timezone.now())
+        GenerationJob.objects.create()
+        self.assertIsNone(claim_job())
+        running.refresh_from_db()
+        self.assertEqual(running.status, JobStatus.RUNNING)
+
+
+class DiffLessonsTests(SimpleTestCase):
+    def test_changes_are_keyed_on_class_and_slot(self):
+        current = {(1, 1, 1): (10, (5, 7, None)), (1, 1, 2): (11, (6, 7, None))}
+        changeset = diff_lessons(current, [(1, 5, 8, 1, 1), (1, 6, 7, 1, 3)], {(1, 1, 3): 101})
+        self.assertEqual(changeset.inserted, [((1, 1, 3), None, (6, 7, 101))])
+        self.assertEqual(changeset.updated, [((1, 1, 1), (5, 7, None), (5, 8, None))])
+        self.assertEqual(changeset.deleted, [((1, 1, 2), (6, 7, None), None)])
+        self.assertEqual(changeset.class_ids(), {1})
+        self.assertEqual(changeset.teacher_ids(), {7, 8})
+
+    def test_same_timetable_gives_no_changes(self):
+        current = {(1, 1, 1): (10, (5, 7, None))}
+        self.assertFalse(diff_lessons(current, [(1, 5, 7, 1, 1)], {}))
+
+
+class ApplyChangesTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        self.lessons = some_lessons()
+
+    def test_first_timetable_is_saved_as_a_version(self):
+        changeset = apply_changes(self.lessons, {})
+        self.assertEqual(len(changeset.inserted), len(self.lessons))
+        self.assertEqual(set(current_lessons()), set(self.lessons))
+        self.assertFalse(ScheduleChange.objects.exists())
+
+    def test_only_changed_lessons_are_written_and_can_be_undone(self):
+        apply_changes(self.lessons, {})
+        version = ScheduleVersion.objects.get()
+        kept = Lesson.objects.get(school_class_id=self.lessons[1][0])
+        c_id, s_id, t_id, d, l = self.lessons[0]
+        moved = [(c_id, s_id, t_id, d + 1, l)] + self.lessons[1:]
+
+        changeset = apply_changes(moved, {})
+        self.assertEqual((len(changeset.inserted), len(changeset.deleted)), (1, 1))
+        self.assertEqual(set(current_lessons()), set(moved))
+        self.assertEqual(ScheduleVersion.objects.get(), version)
+        self.assertTrue(Lesson.objects.filter(pk=kept.pk).exists())
+
+        self.assertEqual(len(undo_change().changes), 2)
+        self.assertEqual(set(current_lessons()), set(self.lessons))
+        self.assertIsNone(undo_change())
+
+    def test_unchanged_timetable_records_no_change(self):
+        apply_changes(self.lessons, {})
+        self.assertFalse(apply_changes(self.lessons, {}))
+        self.assertFalse(ScheduleChange.objects.exists())
+        self.assertIsNone(undo_change())
+
+
+def plain_problem():
+    return {
+        "class_shifts": {1: "1", 2: "1"},
+        "hours_map": {(1, 10): 2, (2, 10): 2, (2, 11): 1},
+        "teacher_subjects": {7: {10}, 8: {11}},
+        "teacher_max_hours": {7: 18, 8: 18},
+        "teacher_availability": {7: None, 8: {(1, 1), (1, 2)}},
+        "subject_difficulty": {10: "hard", 11: "easy"},
+    }
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_only_changed_classes_get_new_digests(self):
+        problem = plain_problem()
+        before = class_digests(problem)
+        problem["hours_map"][(2, 11)] = 2
+        after = class_digests(problem)
+        self.assertEqual(before["1"], after["1"])
+        self.assertNotEqual(before["2"], after["2"])
+
+    def test_teacher_changes_reach_the_classes_of_their_subjects(self):
+        problem = plain_problem()
+        before = class_digests(problem)
+        problem["teacher_availability"][8] = None
+        after = class_digests(problem)
+        self.assertEqual(before["1"], after["1"])
+        self.assertNotEqual(before["2"], after["2"])
+
+    def test_fingerprint_ignores_search_workers_only(self):
+        digests = class_digests(plain_problem())
+        parameters = {"max_time_in_seconds": 30, "num_search_workers": 8}
+        fingerprint = problem_fingerprint(digests, "joint", parameters)
+        self.assertEqual(
+            fingerprint,
+            problem_fingerprint(digests, "joint", dict(parameters, num_search_workers=1)),
+        )
+        self.assertNotEqual(fingerprint, problem_fingerprint(digests, "compact", parameters))
+        self.assertNotEqual(
+            fingerprint,
+            problem_fingerprint(digests, "joint", dict(parameters, max_time_in_seconds=60)),
+        )
+
+
+class SolveCacheTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        generate_schedule(profile="fast_feasible")
+        self.solved = set(current_lessons())
+
+    def test_unchanged_input_is_answered_without_solving(self):
+        with mock.patch.object(
+            or_tools_scheduler, "build_model", side_effect=AssertionError("solved")
+        ):
+            changeset = generate_schedule(profile="fast_feasible")
+        self.assertFalse(changeset)
+        self.assertEqual(set(current_lessons()), self.solved)
+        self.assertEqual(SolveResult.objects.count(), 1)
+
+    def test_changed_active_timetable_is_not_replaced_by_the_cache(self):
+        # Edited since it was cached, as LNS or rescheduling would
+        apply_changes(sorted(self.solved)[1:], {})
+        with mock.patch.object(
+            or_tools_scheduler, "build_model", wraps=or_tools_scheduler.build_model
+        ) as build_model:
+            generate_schedule(profile="fast_feasible")
+        self.assertTrue(build_model.called)
+
+
+def room_problem():
+    # Room 1 is a small general room, 2 a large one, 3 the gym
+    return {
+        "hours_map": {(1, 10): 1, (2, 10): 1, (1, 11): 1, (2, 11): 1},
+        "class_sizes": {1: 20, 2: 30},
+        "room_capacity": {1: 25, 2: 35, 3: 60},
+        "room_subjects": {1: set(), 2: set(), 3: {11}},
+    }
+
+
+class RoomMatchingTests(SimpleTestCase):
+    def test_options_follow_equipment_and_capacity(self):
+        options = room_options(room_problem())
+        self.assertEqual(options[(1, 10)], [1, 2])
+        self.assertEqual(options[(2, 10)], [2])
+        self.assertEqual(options[(1, 11)], [3])
+
+    def test_matching_moves_a_class_to_free_a_room(self):
+        options = room_options(room_problem())
+        lessons = [(1, 10, 7, 1, 1), (2, 10, 8, 1, 1)]
+        # Class 1 prefers room 2, the only one class 2 fits into
+        matched = match_slot(lessons, options, preferred={1: 2})
+        self.assertEqual(matched, {lessons[0]: 1, lessons[1]: 2})
+
+    def test_class_stays_in_its_room_between_lessons(self):
+        options = room_options(room_problem())
+        rooms, unplaced = assign_rooms(
+            [(1, 10, 7, 1, 1), (1, 10, 7, 1, 2), (2, 11, 8, 1, 1)], options
+        )
+        self.assertEqual(unplaced, [])
+        self.assertEqual(rooms[(1, 1, 1)], rooms[(1, 1, 2)])
+
+    def test_lessons_beyond_the_rooms_are_unplaced(self):
+        options = room_options(room_problem())
+        rooms, unplaced = assign_rooms([(1, 11, 7, 1, 1), (2, 11, 8, 1, 1)], options)
+        self.assertEqual(len(rooms), 1)
+        self.assertEqual(len(unplaced), 1)
+
+    def test_limits_count_the_rooms_frozen_lessons_leave_free(self):
+        problem = room_problem()
+        options = room_options(problem)
+        frozen = [(3, 11, 9, 1, 1)]
+        options[(3, 11)] = [3]
+        limits = room_limits(problem, options, frozen, {(3, 1, 1): 3})
+        self.assertIn(([(1, 11), (2, 11)], 1, {(1, 1): 0}), limits)
+
+
+def candidates_of(problem):
+    return candidate_teachers(
+        problem["class_shifts"],
+        problem["hours_map"],
+        problem["teacher_subjects"],
+        problem["teacher_availability"],
+    )
+
+
+class CapacityTests(SimpleTestCase):
+    def test_candidates_work_a_day_per_weekly_hour(self):
+        problem = plain_problem()
+        problem["hours_map"][(2, 11)] = 2
+        candidates = candidates_of(problem)
+        self.assertEqual(candidates[(1, 10)], [7])
+        # Teacher 8 works only on Monday
+        self.assertEqual(candidates[(2, 11)], [])
+
+    def test_enough_teacher_hours_give_no_conflicts(self):
+        problem = plain_problem()
+        self.assertEqual(capacity_conflicts(problem, candidates_of(problem)), [])
+
+    def test_shared_teacher_over_the_weekly_limit_is_the_bottleneck(self):
+        problem = plain_problem()
+        problem["teacher_max_hours"][7] = 3
+        conflicts = capacity_conflicts(problem, candidates_of(problem))
+        self.assertEqual(conflicts, [([(1, 10), (2, 10)], 4, [(7, None, 3)])])
+
+    def test_open_slots_of_a_shift_limit_a_teacher(self):
+        problem = plain_problem()
+        problem["teacher_availability"][7] = {(d, 1) for d in range(1, 4)}
+        problem["hours_map"] = {(1, 10): 2, (2, 10): 2}
+        conflicts = capacity_conflicts(problem, candidates_of(problem))
+        self.assertEqual(conflicts, [([(1, 10), (2, 10)], 4, [(7, "1", 3)])])
+
+
+class ValidationTests(TestCase):
+    def setUp(self):
+        create_small_school()
+
+    def assert_invalid(self, message):
+        problem, snapshot = load_problem()
+        with self.assertLogs("schedule.or_tools_scheduler", "ERROR"):
+            with self.assertRaisesMessage(Exception, message):
+                validate_problem(problem, snapshot)
+
+    def test_school_is_valid(self):
+        problem, snapshot = load_problem()
+        validate_problem(problem, snapshot)
+
+    def test_subject_without_teachers(self):
+        Teacher.objects.filter(subjects__name="Биология").delete()
+        self.assert_invalid("No teachers for subject Биология")
+
+    def test_teachers_without_enough_hours(self):
+        Teacher.objects.filter(subjects__name="История").update(
+            work_time={"max_hours_per_week": 3}
+        )
+        self.assert_invalid("История needs 8h, total capacity 6h from 2 teachers")
+
+    def test_room_too_small_for_a_class(self):
+        SchoolClass.objects.update(students=30)
+        Room.objects.update(capacity=25)
+        self.assert_invalid("No room suitable for Математика seats")
+
+
+class ProblemSnapshotTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        Holiday.objects.create(date=datetime.date(2026, 11, 4))
+
+    def test_snapshot_loads_all_input_in_nine_queries(self):
+        with self.assertNumQueries(9):
+            snapshot = ProblemSnapshot.load(default_max_hours=36)
+        self.assertEqual(snapshot.holidays, {datetime.date(2026, 11, 4)})
+        self.assertEqual(len(snapshot.class_ids), 4)
+        self.assertEqual(snapshot.teacher_max_hours, (36,) * len(snapshot.teacher_ids))
+
+    def test_problem_reflects_the_database(self):
+        problem = ProblemSnapshot.load(default_max_hours=36).problem()
+        biology = Subject.objects.get(name="Биология")
+        school_class = SchoolClass.objects.order_by("pk").first()
+        self.assertEqual(problem["hours_map"][(school_class.pk, biology.pk)], 2)
+        full_time, four_days = Teacher.objects.filter(subjects=biology).order_by("pk")
+        self.assertIsNone(problem["teacher_availability"][full_time.pk])
+        self.assertEqual(len(problem["teacher_availability"][four_days.pk]), 4 * 13)
+        self.assertEqual(problem["teacher_subjects"][full_time.pk], {biology.pk})
+
+    def test_problem_returns_fresh_containers(self):
+        snapshot = ProblemSnapshot.load(default_max_hours=36)
+        snapshot.problem()["hours_map"].clear()
+        self.assertTrue(snapshot.problem()["hours_map"])
+
+
+class SchoolCalendarTests(TestCase):
+    def setUp(self):
+        Holiday.objects.create(date=datetime.date(2026, 11, 4))
+
+    def test_academic_year_starts_in_september(self):
+        self.assertEqual(academic_year(datetime.date(2026, 8, 31)), 2025)
+        self.assertEqual(academic_year(datetime.date(2026, 9, 1)), 2026)
+
+    def test_bitmap_marks_holidays_from_the_first_of_september(self):
+        bitmap = build_bitmap(2026)
+        # 4 November is day 64 of the year
+        self.assertEqual(bitmap[64 >> 3], 1 << (64 & 7))
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 1)
+
+    def test_bitmap_is_stored_once_and_read_once_per_year(self):
+        calendar = SchoolCalendar()
+        self.assertFalse(calendar.is_school_day(datetime.date(2026, 11, 4)))
+        self.assertEqual(HolidayCalendar.objects.count(), 1)
+        with self.assertNumQueries(0):
+            self.assertTrue(calendar.is_school_day(datetime.date(2026, 11, 5)))
+            # Sunday
+            self.assertFalse(calendar.is_school_day(datetime.date(2026, 11, 8)))
+        with self.assertNumQueries(1):
+            self.assertTrue(SchoolCalendar().is_school_day(datetime.date(2026, 11, 5)))
+
+    def test_refresh_rebuilds_the_stored_bitmap(self):
+        SchoolCalendar().bitmap(2026)
+        Holiday.objects.create(date=datetime.date(2026, 11, 5))
+        refresh_holidays([datetime.date(2026, 11, 5)])
+        self.assertFalse(SchoolCalendar().is_school_day(datetime.date(2026, 11, 5)))
+
+
+class LessonCalendarTests(TestCase):
+    def setUp(self):
+        create_small_school()
+        Holiday.objects.create(date=datetime.date(2026, 11, 4))
+        save_version(some_lessons(), {})
+
+    def get(self, query):
+        return self.client.get(f"/api/calendar/?{query}")
+
+    def test_dates_skip_holidays_and_sundays(self):
+        days = occurrences(datetime.date(2026, 11, 2), datetime.date(2026, 11, 9))
+        self.assertEqual([day.day for day, lessons in days], [2, 3, 5, 6, 7, 9])
+
+        # some_lessons are all on Mondays
+        response = self.get("date_from=2026-11-02&date_to=2026-11-09")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(day["date"], len(day["lessons"])) for day in response.json()],
+            [
+                ("2026-11-02", 4),
+                ("2026-11-03", 0),
+                ("2026-11-05", 0),
+                ("2026-11-06", 0),
+                ("2026-11-07", 0),
+                ("2026-11-09", 4),
+            ],
+        )
+
+    def test_bad_dates_are_rejected(self):
+        for query in (
+            "",
+            "date_from=x",
+            "date_from=2026-11-02&date_to=2026-13-01",
+            "date_from=2026-11-09&date_to=2026-11-02",
+            "date_from=2026-01-01&date_to=2028-01-01",
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.get(query).status_code, 400)
@@ -0,0 +1,152 @@
+"""
+Precomputed timetables of classes and teachers for the read API.
+
+Every class and teacher of the active version has a ``TimetableDocument``
+holding its lessons as compact JSON with the fields of
+``LessonSerializer``, so that a read is one lookup by (kind, id) without
+joins or serializing rows. Documents are rebuilt in the transaction that
+activates a version, and for the classes and teachers a ``ChangeSet``
+touches when the active version is changed in place. Lessons edited
+through the dashboard API or the admin, and renamed classes, teachers,
+subjects and rooms (see schedule.signals) rebuild the documents they
+appear in with ``rebuild_timetables``.
+"""
+
+import json
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+
+from schedule.models import Lesson, ScheduleVersion, TimetableDocument, TimetableKind
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+LESSON_FIELDS = (
+    "pk",
+    "weekday",
+    "lesson_number",
+    "subject__name",
+    "teacher_id",
+    "teacher__last_name",
+    "teacher__first_name",
+    "teacher__middle_name",
+    "school_class_id",
+    "school_class__grade__number",
+    "school_class__letter",
+    "room__name",
+)
+
+
+def timetable_lessons(version, class_ids=None, teacher_ids=None):
+    """
+    Lessons of ``version`` by (kind, owner id), in weekday and lesson
+    order. With ``class_ids`` and ``teacher_ids`` only those owners are
+    included, each even without lessons.
+    """
+    lessons = Lesson.objects.filter(version=version)
+    timetables = {}
+    if class_ids is not None:
+        lessons = lessons.filter(Q(school_class_id__in=class_ids) | Q(teacher_id__in=teacher_ids))
+        timetables.update({(TimetableKind.CLASS, c_id): [] for c_id in class_ids})
+        timetables.update({(TimetableKind.TEACHER, t_id): [] for t_id in teacher_ids})
+
+    for (
+        pk,
+        d,
+        l,
+        subject,
+        t_id,
+        last_name,
+        first_name,
+        middle_name,
+        c_id,
+        grade,
+        letter,
+        room,
+    ) in lessons.order_by("weekday", "lesson_number").values_list(*LESSON_FIELDS):
+        lesson = {
+            "id": pk,
+            "weekday": d,
+            "lesson_number": l,
+            "subject": subject,
+            "teacher": {
+                "id": t_id,
+                "last_name": last_name,
+                "first_name": first_name,
+                "middle_name": middle_name,
+            },
+            "school_class": f"{grade}{letter}",
+            "room": room,
+        }
+        for key in ((TimetableKind.CLASS, c_id), (TimetableKind.TEACHER, t_id)):
+            if class_ids is None or key in timetables:
+                timetables.setdefault(key, []).append(lesson)
+    return timetables
+
+
+def build_timetables(version, class_ids=None, teacher_ids=None):
+    """
+    Replace the documents of the classes in ``class_ids`` and teachers in
+    ``teacher_ids`` with their timetables in ``version``; without ids all
+    documents are replaced. Call inside the transaction that changes the
+    lessons, so readers never see documents of another version.
+    """
+    timetables = timetable_lessons(version, class_ids, teacher_ids)
+    documents = TimetableDocument.objects.all()
+    if class_ids is not None:
+        documents = documents.filter(
+            Q(kind=TimetableKind.CLASS, owner_id__in=class_ids)
+            | Q(kind=TimetableKind.TEACHER, owner_id__in=teacher_ids)
+        )
+    documents.delete()
+    TimetableDocument.objects.bulk_create(
+        [
+            TimetableDocument(
+                kind=kind,
+                owner_id=owner_id,
+                version=version,
+                body=json.dumps(
+                    {"version": version.pk, "lessons": lessons},
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                ),
+            )
+            for (kind, owner_id), lessons in timetables.items()
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    logger.info(f"Built {len(timetables)} timetable documents of version {version.pk}.")
+
+
+def lesson_owners(lessons):
+    """Class ids and teacher ids of the ``lessons`` queryset or list."""
+    if hasattr(lessons, "values_list"):
+        pairs = set(lessons.values_list("school_class_id", "teacher_id"))
+    else:
+        pairs = {(lesson.school_class_id, lesson.teacher_id) for lesson in lessons}
+    return {c_id for c_id, t_id in pairs}, {t_id for c_id, t_id in pairs}
+
+
+def rebuild_timetables(class_ids=(), teacher_ids=()):
+    """
+    Rebuild the documents of ``class_ids`` and ``teacher_ids`` in the
+    active version after an edit outside schedule.persistence.
+    """
+    class_ids, teacher_ids = set(class_ids), set(teacher_ids)
+    if not class_ids and not teacher_ids:
+        return
+    with transaction.atomic():
+        version = ScheduleVersion.objects.select_for_update().filter(is_active=True).first()
+        if version is not None:
+            build_timetables(version, class_ids, teacher_ids)
+
+
+def timetable_document(kind, owner_id):
+    """JSON text of the timetable of a class or teacher, or None."""
+    return (
+        TimetableDocument.objects.filter(kind=kind, owner_id=owner_id)
+        .values_list("body", flat=True)
+        .first()
+    )
@@ -1,10 +1,23 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LessonViewSet, SchoolClassViewSet
+from .views import (
+    LessonViewSet,
+    LessonCalendarViewSet,
+    ClassTimetableViewSet,
+    TeacherTimetableViewSet,
+    SchoolClassViewSet,
+    GenerationJobViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"lessons", LessonViewSet, basename="lessons")
+router.register(r"calendar", LessonCalendarViewSet, basename="calendar")
+router.register(r"timetables/classes", ClassTimetableViewSet, basename="class-timetables")
+router.register(
+    r"timetables/teachers", TeacherTimetableViewSet, basename="teacher-timetables"
+)
 router.register(r"classes", SchoolClassViewSet, basename="classes")
+router.register(r"generation-jobs", GenerationJobViewSet, basename="generation-jobs")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,10 +1,43 @@
+import datetime
+
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from django.http import HttpResponse
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny
-from .models import Lesson, SchoolClass
-from .serializers import LessonSerializer, SchoolClassSerializer
+from rest_framework import status
+from rest_framework.response import Response
+from .jobs import enqueue_reschedule, request_stop
+from .models import Lesson, SchoolClass, GenerationJob, TimetableKind
+from .school_calendar import occurrences
+from .serializers import (
+    LessonSerializer,
+    SchoolClassSerializer,
+    GenerationJobSerializer,
+    RescheduleSerializer,
+)
+from .timetables import timetable_document
+
+# Longest date range the calendar endpoint expands
+MAX_CALENDAR_DAYS = 366
+
+
+def query_date(params, name, default=None):
+    value = params.get(name)
+    if value is None and default is not None:
+        return default
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Укажите дату в формате ГГГГ-ММ-ДД."})
+
+
+class ActiveLessonsMixin:
+    """Lessons of the active version, filtered by ``teacher_id`` and ``class_id``."""
 
-class LessonViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Lesson.objects.select_related("teacher", "school_class", "subject", "room").all()
+    queryset = Lesson.objects.active().select_related(
+        "teacher", "school_class__grade", "subject", "room"
+    )
     serializer_class = LessonSerializer
     permission_classes = [AllowAny]
 
@@ -20,7 +53,82 @@ class LessonViewSet(viewsets.ReadOnlyModelViewSet):
         return qs
 
 
+class LessonViewSet(ActiveLessonsMixin, viewsets.ReadOnlyModelViewSet):
+    pass
+
+
+class LessonCalendarViewSet(ActiveLessonsMixin, viewsets.GenericViewSet):
+    def list(self, request):
+        """
+        Lessons by date from ``date_from`` to ``date_to`` (one day by
+        default), without holidays and Sundays.
+        """
+        start = query_date(request.query_params, "date_from")
+        end = query_date(request.query_params, "date_to", default=start)
+        if not start <= end < start + datetime.timedelta(days=MAX_CALENDAR_DAYS):
+            raise ValidationError(
+                {"date_to": f"Не раньше date_from и не дальше {MAX_CALENDAR_DAYS} дней от неё."}
+            )
+        # Each weekday is serialized once, however many dates it covers
+        weekdays = {}
+        days = []
+        for day, lessons in occurrences(start, end, self.get_queryset()):
+            if day.isoweekday() not in weekdays:
+                weekdays[day.isoweekday()] = self.get_serializer(lessons, many=True).data
+            days.append({"date": day, "lessons": weekdays[day.isoweekday()]})
+        return Response(days)
+
+
+class TimetableViewSet(viewsets.GenericViewSet):
+    """
+    Timetable of one class or teacher as the stored document, see
+    schedule.timetables: the lessons list of the lessons endpoint for
+    that class or teacher, without querying lessons.
+    """
+
+    permission_classes = [AllowAny]
+    lookup_value_regex = r"\d+"
+    kind = None
+
+    def retrieve(self, request, pk=None):
+        body = timetable_document(self.kind, pk)
+        if body is None:
+            raise NotFound()
+        return HttpResponse(body, content_type="application/json")
+
+
+class ClassTimetableViewSet(TimetableViewSet):
+    kind = TimetableKind.CLASS
+
+
+class TeacherTimetableViewSet(TimetableViewSet):
+    kind = TimetableKind.TEACHER
+
+
 class SchoolClassViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = SchoolClass.objects.select_related("grade").all()
     serializer_class = SchoolClassSerializer
     permission_classes = [AllowAny]
+
+
+class GenerationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = GenerationJob.objects.all()
+    serializer_class = GenerationJobSerializer
+
+    @action(detail=True, methods=["post"])
+    def stop(self, request, pk=None):
+        job = self.get_object()
+        request_stop(job.pk)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=False, methods=["post"])
+    def reschedule(self, request):
+        """
+        Queue re-solving the classes touched by absent or changed teachers,
+        changed classes or changed weekly hours, keeping all other lessons.
+        """
+        arguments = RescheduleSerializer(data=request.data)
+        arguments.is_valid(raise_exception=True)
+        job = enqueue_reschedule(arguments.validated_data["profile"], **arguments.options())
+        return Response(self.get_serializer(job).data, status=status.HTTP_201_CREATED)
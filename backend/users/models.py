@@ -26,6 +26,22 @@ LESSONS = [
 ]
 
 
+def work_time_slots(work_time):
+    """
+    Set of (weekday, lesson_number) pairs from a teacher's work_time grid,
+    with weekdays numbered 1–6 and lessons 1–13 as in Lesson. Returns None
+    when the grid is not filled in, meaning the teacher is available at
+    any time.
+    """
+    slots = {
+        (d_idx, l_idx)
+        for d_idx, day in enumerate(WEEKDAYS, start=1)
+        for l_idx, lesson in enumerate(LESSONS, start=1)
+        if lesson in work_time.get(day, [])
+    }
+    return slots or None
+
+
 class Teacher(models.Model):
     username = models.CharField(max_length=150, unique=True, default="")
     password = models.CharField(max_length=128, default="password")
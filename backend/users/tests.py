@@ -1,3 +1,13 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from users.models import work_time_slots
+
+
+class WorkTimeSlotsTests(SimpleTestCase):
+    def test_grid_becomes_weekday_and_lesson_numbers(self):
+        work_time = {"Пн": ["1.1", "1.3"], "Сб": ["2.6"], "max_hours_per_week": 18}
+        self.assertEqual(work_time_slots(work_time), {(1, 1), (1, 3), (6, 13)})
+
+    def test_empty_grid_means_any_time(self):
+        self.assertIsNone(work_time_slots({}))
+        self.assertIsNone(work_time_slots({"Пн": [], "max_hours_per_week": 18}))